@@ -1,45 +1,64 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError
+from fastapi import Depends, HTTPException, Request, status
+from jwt import InvalidTokenError as JWTError
 
-from app.db.session import get_session
-from app.models.user import User
+from app.core import user_cache
+from app.core.user_cache import CachedUser
+from app.db.session import UNIT_OF_WORK, SessionLocal
 from app.repositories.user_repository import UserRepository
 from app.models.enums import UserRole
 from app.core.security import decode_access_token
 
-security = HTTPBearer(auto_error=False)
-
 
 async def get_db() -> AsyncGenerator:
-    async with get_session() as session:
-        yield session
+    async with SessionLocal() as session:
+        session.info[UNIT_OF_WORK] = True
+        try:
+            yield session
+        except HTTPException:
+            await session.commit()
+            raise
+        except Exception:
+            await session.rollback()
+            raise
+        await session.commit()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    session=Depends(get_db),
-) -> User:
-    if credentials is None:
+async def bearer_token(request: Request) -> str | None:
+    header = request.headers.get("authorization")
+    if header and header[:7].lower() == "bearer ":
+        return header[7:] or None
+    return None
+
+
+async def get_current_claims(token: str | None = Depends(bearer_token)) -> dict[str, Any]:
+    if token is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    token = credentials.credentials
     try:
         payload = decode_access_token(token)
     except (JWTError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from None
-    user_id = payload.get("sub")
-    if user_id is None:
+    if payload.get("sub") is None or payload.get("kind") is not None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    repo = UserRepository(session)
-    user = await repo.get_by_id(int(user_id))
+    return payload
+
+
+async def get_current_user(
+    claims: dict[str, Any] = Depends(get_current_claims),
+    session=Depends(get_db),
+) -> CachedUser:
+    user_id = claims["sub"]
+    cached = user_cache.get(int(user_id))
+    if cached is not None:
+        return cached
+    user = await UserRepository.get_by_id(session, int(user_id))
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    return user_cache.store(user)
 
 
-async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+async def get_current_admin(user: CachedUser = Depends(get_current_user)) -> CachedUser:
     if user.role != UserRole.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
     return user
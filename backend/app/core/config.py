@@ -1,4 +1,3 @@
-from functools import lru_cache
 from typing import List, Tuple
 
 from pydantic import field_validator
@@ -19,6 +18,12 @@ class Settings(BaseSettings):
     jwt_expires: int = 3600
     database_url: str = "sqlite+aiosqlite:///./tuberry.db"
     redis_url: str = "redis://localhost:6379/0"
+    db_init_on_startup: bool = False
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_recycle: int = 1800
+    db_pool_timeout: float = 5.0
+    db_pgbouncer: bool = False
 
     master_bot_token: str = ""
     master_bot_name: str = ""
@@ -50,7 +55,8 @@ class Settings(BaseSettings):
     admin_account_email: str = "admin@tuberry.local"
     admin_account_name: str = "Tuberry Admin"
 
-    cors_origins: List[str] = ["*"]
+    cors_origins: List[str] = []
+    cors_origin_regex: str | None = r"https?://(localhost|127\.0\.0\.1|(www\.)?tgmcrm\.ru|.*\.tuberry\.local)(:\d+)?"
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
@@ -79,9 +85,4 @@ class Settings(BaseSettings):
         }
 
 
-@lru_cache
-def get_settings() -> Settings:
-    return Settings()
-
-
-settings = get_settings()
+settings = Settings()
@@ -0,0 +1,31 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+
+import httpx
+
+_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, float], httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client(base_url: str = "", *, timeout: float) -> httpx.AsyncClient:
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    key = (base_url, float(timeout))
+    client = clients.get(key)
+    if client is None or client.is_closed:
+        client = clients[key] = httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=_LIMITS)
+    return client
+
+
+@asynccontextmanager
+async def shared_client(base_url: str = "", *, timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    yield get_client(base_url, timeout=timeout)
+
+
+async def close_clients() -> None:
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(client.aclose() for client in clients.values()))
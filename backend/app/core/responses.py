@@ -0,0 +1,12 @@
+from typing import Any, Iterable
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+def json_bytes(payload: bytes | str, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=payload, status_code=status_code, media_type="application/json")
+
+
+def json_list(adapter: TypeAdapter, items: Iterable[Any]) -> Response:
+    return json_bytes(adapter.dump_json(adapter.validate_python(items, from_attributes=True)))
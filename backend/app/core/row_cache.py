@@ -0,0 +1,48 @@
+import time
+from typing import Any, Dict, Generic, Hashable, Tuple, Type, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+ModelT = TypeVar("ModelT")
+
+
+class RowCache(Generic[ModelT]):
+    def __init__(self, model: Type[ModelT], *, ttl: float, maxsize: int = 1024):
+        self.model = model
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._columns = tuple(column.name for column in model.__table__.columns)
+        self._entries: Dict[Hashable, Tuple[Dict[str, Any], float]] = {}
+
+    async def get(self, session: AsyncSession, key: Hashable) -> ModelT | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        values, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        existing = session.identity_map.get(identity_key(self.model, values["id"]))
+        if existing is not None:
+            return existing
+        instance = self.model(**values)
+        make_transient_to_detached(instance)
+        return await session.merge(instance, load=False)
+
+    def store(self, key: Hashable, instance: ModelT) -> None:
+        now = time.monotonic()
+        if len(self._entries) >= self.maxsize:
+            for stale in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[stale]
+            while len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+        values = {name: getattr(instance, name) for name in self._columns}
+        self._entries[key] = (values, now + self.ttl)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -1,32 +1,96 @@
-from datetime import datetime, timedelta
-from typing import Any, Dict
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Tuple
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import bcrypt
+import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from jwt import InvalidTokenError as JWTError
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+_TOKEN_CACHE_MAXSIZE = 10_000
+_TOKEN_CACHE_MAX_TTL = 3600
+_token_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+_token_cache_lock = threading.Lock()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith("$2"):
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.to_thread(get_password_hash, password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
 
 
 def create_access_token(subject: str, expires_seconds: int | None = None, extra_claims: Dict[str, Any] | None = None) -> str:
-    expire = datetime.utcnow() + timedelta(seconds=expires_seconds or settings.jwt_expires)
-    to_encode = {"sub": subject, "exp": expire}
+    expire = int(time.time()) + (expires_seconds or settings.jwt_expires)
+    to_encode: Dict[str, Any] = {"sub": subject, "exp": expire}
     if extra_claims:
         to_encode.update(extra_claims)
     return jwt.encode(to_encode, settings.jwt_secret, algorithm="HS256")
 
 
+def _get_cached_claims(token: str, now: float) -> Dict[str, Any] | None:
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= now:
+            del _token_cache[token]
+            return None
+        return payload
+
+
+def _store_claims(token: str, payload: Dict[str, Any], now: float) -> None:
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)):
+        return
+    ttl = min(exp - now, _TOKEN_CACHE_MAX_TTL)
+    if ttl <= 0:
+        return
+    with _token_cache_lock:
+        if len(_token_cache) >= _TOKEN_CACHE_MAXSIZE:
+            expired = [key for key, (_, expires_at) in _token_cache.items() if expires_at <= now]
+            for key in expired:
+                del _token_cache[key]
+            while len(_token_cache) >= _TOKEN_CACHE_MAXSIZE:
+                del _token_cache[next(iter(_token_cache))]
+        _token_cache[token] = (payload, now + ttl)
+
+
 def decode_access_token(token: str) -> Dict[str, Any]:
+    now = time.time()
+    cached = _get_cached_claims(token, now)
+    if cached is not None:
+        return dict(cached)
     try:
-        return jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
     except JWTError as exc:
         raise ValueError("Invalid token") from exc
+    _store_claims(token, payload, now)
+    return dict(payload)
@@ -0,0 +1,65 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from app.models.enums import UserRole
+from app.models.user import User
+
+USER_CACHE_TTL = 15
+USER_CACHE_MAXSIZE = 10_000
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    client_id: Optional[int]
+    telegram_user_id: Optional[str]
+    email: Optional[str]
+    full_name: Optional[str]
+    role: UserRole
+    is_active: bool
+    is_privileged: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            client_id=user.client_id,
+            telegram_user_id=user.telegram_user_id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+            is_privileged=user.is_privileged,
+        )
+
+
+_cache: Dict[int, Tuple[CachedUser, float]] = {}
+
+
+def get(user_id: int) -> CachedUser | None:
+    entry = _cache.get(user_id)
+    if entry is None:
+        return None
+    user, expires_at = entry
+    if expires_at <= time.monotonic():
+        _cache.pop(user_id, None)
+        return None
+    return user
+
+
+def store(user: User) -> CachedUser:
+    snapshot = CachedUser.from_user(user)
+    now = time.monotonic()
+    if len(_cache) >= USER_CACHE_MAXSIZE:
+        for key in [key for key, (_, expires_at) in _cache.items() if expires_at <= now]:
+            del _cache[key]
+        while len(_cache) >= USER_CACHE_MAXSIZE:
+            del _cache[next(iter(_cache))]
+    _cache[snapshot.id] = (snapshot, now + USER_CACHE_TTL)
+    return snapshot
+
+
+def invalidate(user_id: int | None) -> None:
+    if user_id is not None:
+        _cache.pop(user_id, None)
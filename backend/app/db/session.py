@@ -1,123 +1,142 @@
-from contextlib import asynccontextmanager
+import asyncio
 
-from sqlalchemy import text
+from loguru import logger
+from sqlalchemy import text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 
 from app.core.config import settings
 from app.models import telegram_chat  # noqa: F401
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
+
+def _engine_options() -> dict:
+    if "postgresql" not in settings.database_url:
+        return {}
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_use_lifo": True,
+        "connect_args": _connect_args(),
+    }
+
+
+def _connect_args() -> dict:
+    if settings.db_pgbouncer:
+        return {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    return {"statement_cache_size": 1024, "prepared_statement_cache_size": 512}
+
+
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    future=True,
+    query_cache_size=1200,
+    **_engine_options(),
+)
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
+UNIT_OF_WORK = "unit_of_work"
+
+
+async def flush_or_commit(session: AsyncSession) -> None:
+    if session.info.get(UNIT_OF_WORK):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def update_columns(session: AsyncSession, instance, values: dict) -> None:
+    model = type(instance)
+    stmt = update(model).where(model.id == instance.id).values(**values).execution_options(synchronize_session=False)
+    touched = "updated_at" in model.__table__.c and "updated_at" not in values
+    if touched:
+        stmt = stmt.returning(model.updated_at)
+    result = await session.execute(stmt)
+    for key, value in values.items():
+        set_committed_value(instance, key, value)
+    if touched:
+        set_committed_value(instance, "updated_at", result.scalar())
+
+
+async def release_connection(session: AsyncSession) -> None:
+    await session.commit()
 
-@asynccontextmanager
-async def get_session() -> AsyncSession:
-    async with SessionLocal() as session:
-        yield session
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert_insert(session: AsyncSession):
+    return _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+
+
+_REQUIRED_COLUMNS: tuple[tuple[str, str, str], ...] = (
+    ("clients", "require_reply_for_avito", "BOOLEAN DEFAULT FALSE"),
+    ("clients", "hide_system_messages", "BOOLEAN DEFAULT TRUE"),
+    ("messages", "telegram_message_id", "VARCHAR"),
+    ("messages", "is_client_message", "BOOLEAN DEFAULT FALSE"),
+    ("dialogs", "topic_intro_sent", "BOOLEAN DEFAULT FALSE"),
+    ("dialogs", "auto_reply_scheduled_at", "TIMESTAMP"),
+    ("dialogs", "source", "VARCHAR(32) DEFAULT 'avito'"),
+    ("dialogs", "telegram_source_id", "INTEGER"),
+    ("dialogs", "personal_account_id", "INTEGER"),
+    ("dialogs", "external_reference", "VARCHAR"),
+    ("dialogs", "external_display_name", "VARCHAR"),
+    ("dialogs", "external_username", "VARCHAR"),
+    ("dialogs", "project_id", "INTEGER"),
+    ("avito_accounts", "webhook_secret", "VARCHAR"),
+    ("avito_accounts", "webhook_url", "VARCHAR"),
+    ("avito_accounts", "webhook_enabled", "BOOLEAN DEFAULT FALSE"),
+    ("avito_accounts", "webhook_last_error", "TEXT"),
+    ("avito_accounts", "project_id", "INTEGER"),
+    ("telegram_sources", "project_id", "INTEGER"),
+)
+
+_NULLABLE_COLUMNS: tuple[tuple[str, str], ...] = (("dialogs", "avito_account_id"),)
+
+
+def sync_schema(connection: Connection) -> None:
+    SQLModel.metadata.create_all(connection)
+    if connection.dialect.name != "postgresql":
+        return
+    tables = sorted({table for table, _, _ in _REQUIRED_COLUMNS} | {table for table, _ in _NULLABLE_COLUMNS})
+    result = connection.execute(
+        text(
+            "SELECT table_name, column_name, is_nullable FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = ANY(:tables)"
+        ),
+        {"tables": tables},
+    )
+    existing = {(row.table_name, row.column_name): row.is_nullable == "YES" for row in result}
+
+    for table, column, column_type in _REQUIRED_COLUMNS:
+        if (table, column) not in existing:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {column_type}"))
+    for table, column in _NULLABLE_COLUMNS:
+        if existing.get((table, column)) is False:
+            connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL"))
 
 
 async def init_db() -> None:
     async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
-        if "postgresql" in settings.database_url:
-            await conn.execute(
-                text(
-                    "ALTER TABLE clients ADD COLUMN IF NOT EXISTS require_reply_for_avito BOOLEAN DEFAULT FALSE"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS telegram_message_id VARCHAR"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS topic_intro_sent BOOLEAN DEFAULT FALSE"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE clients ADD COLUMN IF NOT EXISTS hide_system_messages BOOLEAN DEFAULT TRUE"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS auto_reply_scheduled_at TIMESTAMP"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS is_client_message BOOLEAN DEFAULT FALSE"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE avito_accounts ADD COLUMN IF NOT EXISTS webhook_secret VARCHAR"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE avito_accounts ADD COLUMN IF NOT EXISTS webhook_url VARCHAR"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE avito_accounts ADD COLUMN IF NOT EXISTS webhook_enabled BOOLEAN DEFAULT FALSE"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE avito_accounts ADD COLUMN IF NOT EXISTS webhook_last_error TEXT"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ALTER COLUMN avito_account_id DROP NOT NULL"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS source VARCHAR(32) DEFAULT 'avito'"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS telegram_source_id INTEGER"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS personal_account_id INTEGER"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS external_reference VARCHAR"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS external_display_name VARCHAR"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS external_username VARCHAR"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS project_id INTEGER"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE avito_accounts ADD COLUMN IF NOT EXISTS project_id INTEGER"
-                )
-            )
-            await conn.execute(
-                text(
-                    "ALTER TABLE telegram_sources ADD COLUMN IF NOT EXISTS project_id INTEGER"
-                )
-            )
+        await conn.run_sync(sync_schema)
+
+
+async def warm_pool() -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    results = await asyncio.gather(
+        *(engine.connect() for _ in range(settings.db_pool_size)),
+        return_exceptions=True,
+    )
+    connections = [conn for conn in results if not isinstance(conn, BaseException)]
+    await asyncio.gather(*(conn.close() for conn in connections))
+    if len(connections) < len(results):
+        logger.warning("Pool warm-up opened {} of {} connections", len(connections), len(results))
@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.core.config import settings
-from app.db.session import init_db
+from app.core.http import close_clients
+from app.db.session import init_db, warm_pool
 from app.routes import (
     admin,
     auth,
@@ -16,11 +18,12 @@ from app.routes import (
     personal_telegram_accounts,
 )
 
-app = FastAPI(title="Tuberry API", version="0.1.0")
+app = FastAPI(title="Tuberry API", version="0.1.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
+    allow_origin_regex=settings.cors_origin_regex,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -29,7 +32,14 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def on_startup() -> None:
-    await init_db()
+    if settings.app_env == "development" or settings.db_init_on_startup:
+        await init_db()
+    await warm_pool()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await close_clients()
 
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
+from sqlalchemy import Column, ForeignKey, Integer
 from sqlmodel import Field, Relationship
 
 from app.models.base import TimestampedModel
@@ -23,7 +24,10 @@ class AvitoAccount(TimestampedModel, table=True):
     access_token: Optional[str] = None
     token_expires_at: Optional[datetime] = None
     status: AvitoAccountStatus = Field(default=AvitoAccountStatus.active)
-    bot_id: Optional[int] = Field(default=None, foreign_key="bots.id")
+    bot_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, ForeignKey("bots.id", ondelete="SET NULL"), nullable=True),
+    )
     monitoring_enabled: bool = Field(default=True)
     webhook_secret: Optional[str] = Field(default=None, index=True)
     webhook_url: Optional[str] = Field(default=None)
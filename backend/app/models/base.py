@@ -1,9 +1,12 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import func
 from sqlmodel import Field, SQLModel
 
 
 class TimestampedModel(SQLModel):
-    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    updated_at: Optional[datetime] = Field(default=None)
+    __mapper_args__ = {"eager_defaults": True}
+
+    created_at: datetime = Field(nullable=False, sa_column_kwargs={"server_default": func.now()})
+    updated_at: Optional[datetime] = Field(default=None, sa_column_kwargs={"onupdate": func.now()})
@@ -23,4 +23,7 @@ class Bot(TimestampedModel, table=True):
     webhook_secret: Optional[str] = Field(default=None, index=True)
 
     client: "Client" = Relationship(back_populates="bots")
-    dialogs: List["Dialog"] = Relationship(back_populates="bot")
+    dialogs: List["Dialog"] = Relationship(
+        back_populates="bot",
+        sa_relationship_kwargs={"passive_deletes": "all"},
+    )
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import Column, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, text
 from sqlmodel import Field, Relationship
 
 from app.models.base import TimestampedModel
@@ -17,6 +17,23 @@ if TYPE_CHECKING:
 
 class Dialog(TimestampedModel, table=True):
     __tablename__ = "dialogs"
+    __table_args__ = (
+        Index("ux_dialogs_client_avito_source", "client_id", "avito_dialog_id", "source", unique=True),
+        Index(
+            "ix_dialogs_account_avito",
+            "avito_account_id",
+            "avito_dialog_id",
+            postgresql_where=text("source = 'avito'"),
+        ),
+        Index("ix_dialogs_bot_topic", "bot_id", "telegram_topic_id"),
+        Index("ix_dialogs_bot_chat_last", "bot_id", "telegram_chat_id", "last_message_at"),
+        Index(
+            "ix_dialogs_tgsrc_ref",
+            "telegram_source_id",
+            "external_reference",
+            postgresql_where=text("source = 'telegram'"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="clients.id")
@@ -28,7 +45,9 @@ class Dialog(TimestampedModel, table=True):
     avito_account_id: Optional[int] = Field(default=None, foreign_key="avito_accounts.id")
     telegram_source_id: Optional[int] = Field(default=None, foreign_key="telegram_sources.id")
     personal_account_id: Optional[int] = Field(default=None, foreign_key="personal_telegram_accounts.id")
-    bot_id: int = Field(foreign_key="bots.id")
+    bot_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("bots.id", ondelete="CASCADE"), nullable=False),
+    )
     avito_dialog_id: str = Field(index=True)
     telegram_topic_id: Optional[str] = Field(default=None, index=True)
     telegram_chat_id: Optional[str] = Field(default=None)
@@ -45,4 +64,7 @@ class Dialog(TimestampedModel, table=True):
     avito_account: Optional["AvitoAccount"] = Relationship(back_populates="dialogs")
     telegram_source: Optional["TelegramSource"] = Relationship(back_populates="dialogs")
     personal_account: Optional["PersonalTelegramAccount"] = Relationship()
-    messages: List["Message"] = Relationship(back_populates="dialog")
+    messages: List["Message"] = Relationship(
+        back_populates="dialog",
+        sa_relationship_kwargs={"passive_deletes": True},
+    )
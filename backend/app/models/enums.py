@@ -1,42 +1,51 @@
 from enum import Enum
+from typing import Optional, TypeVar
 
+_E = TypeVar("_E", bound="ValueEnum")
 
-class UserRole(str, Enum):
+
+class ValueEnum(str, Enum):
+    @classmethod
+    def from_value(cls: type[_E], value: object, default: Optional[_E] = None) -> Optional[_E]:
+        return cls._value2member_map_.get(value, default)
+
+
+class UserRole(ValueEnum):
     owner = "owner"
     manager = "manager"
     admin = "admin"
 
 
-class BotStatus(str, Enum):
+class BotStatus(ValueEnum):
     active = "active"
     inactive = "inactive"
     error = "error"
 
 
-class TelegramSourceStatus(str, Enum):
+class TelegramSourceStatus(ValueEnum):
     active = "active"
     inactive = "inactive"
     error = "error"
 
 
-class PersonalTelegramAccountStatus(str, Enum):
+class PersonalTelegramAccountStatus(ValueEnum):
     pending = "pending"
     active = "active"
     error = "error"
 
 
-class AvitoAccountStatus(str, Enum):
+class AvitoAccountStatus(ValueEnum):
     active = "active"
     expired = "expired"
     blocked = "blocked"
 
 
-class DialogState(str, Enum):
+class DialogState(ValueEnum):
     active = "active"
     closed = "closed"
 
 
-class MessageDirection(str, Enum):
+class MessageDirection(ValueEnum):
     avito = "avito"
     telegram = "telegram"
     telegram_source_in = "telegram_source_in"
@@ -45,19 +54,19 @@ class MessageDirection(str, Enum):
     personal_telegram_out = "personal_telegram_out"
 
 
-class MessageStatus(str, Enum):
+class MessageStatus(ValueEnum):
     pending = "pending"
     sent = "sent"
     delivered = "delivered"
     failed = "failed"
 
 
-class AutoReplyMode(str, Enum):
+class AutoReplyMode(ValueEnum):
     always = "always"
     first = "first"
 
 
-class DialogSource(str, Enum):
+class DialogSource(ValueEnum):
     avito = "avito"
     telegram = "telegram"
     personal_telegram = "personal_telegram"
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
+from sqlalchemy import Column, ForeignKey, Index, Integer, text
 from sqlmodel import Field, Relationship
 
 from app.models.base import TimestampedModel
@@ -12,9 +13,21 @@ if TYPE_CHECKING:
 
 class Message(TimestampedModel, table=True):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_dir_src", "direction", "source_message_id", "id"),
+        Index("ix_messages_tgmid", "telegram_message_id", "id"),
+        Index(
+            "ix_messages_outgoing",
+            "dialog_id",
+            "created_at",
+            postgresql_where=text("direction = 'telegram' AND is_auto_reply = false"),
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    dialog_id: int = Field(foreign_key="dialogs.id")
+    dialog_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("dialogs.id", ondelete="CASCADE"), nullable=False),
+    )
     direction: MessageDirection
     source_message_id: Optional[str] = Field(default=None, index=True)
     telegram_message_id: Optional[str] = Field(default=None, index=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Index, Integer, UniqueConstraint, text
 from sqlmodel import Field, SQLModel
 
 from app.models.base import TimestampedModel
@@ -11,10 +11,15 @@ from app.models.base import TimestampedModel
 
 class TelegramChat(TimestampedModel, table=True):
     __tablename__ = "telegram_chats"
-    __table_args__ = (UniqueConstraint("bot_id", "chat_id", name="uq_bot_chat"),)
+    __table_args__ = (
+        UniqueConstraint("bot_id", "chat_id", name="uq_bot_chat"),
+        Index("ix_tgchat_active_list", "bot_id", "title", "chat_id", postgresql_where=text("is_active")),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    bot_id: int = Field(foreign_key="bots.id", index=True)
+    bot_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("bots.id", ondelete="CASCADE"), nullable=False, index=True),
+    )
     chat_id: str = Field(index=True)
     chat_type: Optional[str] = Field(default=None)
     title: Optional[str] = Field(default=None)
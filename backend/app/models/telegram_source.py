@@ -1,9 +1,11 @@
 from typing import TYPE_CHECKING, List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 
 from app.models.base import TimestampedModel
 from app.models.enums import TelegramSourceStatus
+from app.utils.tokens import fresh_token
 
 if TYPE_CHECKING:
     from app.models.bot import Bot
@@ -13,6 +15,7 @@ if TYPE_CHECKING:
 
 class TelegramSource(TimestampedModel, table=True):
     __tablename__ = "telegram_sources"
+    __table_args__ = (Index("ux_tgsrc_token", "token", unique=True),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="clients.id")
@@ -22,7 +25,7 @@ class TelegramSource(TimestampedModel, table=True):
     bot_username: Optional[str] = Field(default=None)
     display_name: Optional[str] = Field(default=None)
     status: TelegramSourceStatus = Field(default=TelegramSourceStatus.inactive)
-    webhook_secret: Optional[str] = Field(default=None, index=True)
+    webhook_secret: str = Field(default_factory=fresh_token, nullable=False, index=True)
     description: Optional[str] = Field(default=None, nullable=True)
 
     bot: "Bot" = Relationship()
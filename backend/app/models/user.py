@@ -9,6 +9,9 @@ if TYPE_CHECKING:
     from app.models.client import Client
 
 
+_PRIVILEGED_ROLES = frozenset((UserRole.owner, UserRole.admin))
+
+
 class User(TimestampedModel, table=True):
     __tablename__ = "users"
 
@@ -23,6 +26,10 @@ class User(TimestampedModel, table=True):
 
     client: Optional["Client"] = Relationship(back_populates="users")
 
+    @property
+    def is_privileged(self) -> bool:
+        return self.role in _PRIVILEGED_ROLES
+
 
 class UserCreate(SQLModel):
     email: Optional[str]
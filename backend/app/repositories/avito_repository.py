@@ -1,10 +1,39 @@
 from datetime import datetime
-import secrets
 
-from sqlalchemy import select
+from sqlalchemy import Row, bindparam, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.session import flush_or_commit
 from app.models.avito import AvitoAccount
+from app.models.bot import Bot
+from app.models.project import Project
+from app.utils.tokens import fresh_token
+
+
+_AVITO_COLS = frozenset(column.name for column in AvitoAccount.__table__.columns)
+
+_GET_WITH_PROJECT_AND_BOT = (
+    select(AvitoAccount, Project, Bot)
+    .outerjoin(Project, Project.id == AvitoAccount.project_id)
+    .outerjoin(Bot, Bot.id == func.coalesce(Project.bot_id, AvitoAccount.bot_id))
+)
+_LIST_COLS = (
+    AvitoAccount.id,
+    AvitoAccount.client_id,
+    AvitoAccount.name,
+    AvitoAccount.api_client_id,
+    AvitoAccount.status,
+    AvitoAccount.token_expires_at,
+    AvitoAccount.bot_id,
+    AvitoAccount.project_id,
+    AvitoAccount.created_at,
+    AvitoAccount.monitoring_enabled,
+    AvitoAccount.webhook_enabled,
+    AvitoAccount.webhook_url,
+    AvitoAccount.webhook_last_error,
+)
+_LIST_FOR_CLIENT_RAW = select(*_LIST_COLS).where(AvitoAccount.client_id == bindparam("client_id"))
+_LIST_FOR_PROJECT_RAW = select(*_LIST_COLS).where(AvitoAccount.project_id == bindparam("project_id"))
 
 
 class AvitoAccountRepository:
@@ -13,15 +42,30 @@ class AvitoAccountRepository:
 
     async def list_for_client(self, client_id: int) -> list[AvitoAccount]:
         result = await self.session.execute(select(AvitoAccount).where(AvitoAccount.client_id == client_id))
-        return list(result.scalars().all())
+        return result.scalars().all()
+
+    async def list_for_client_raw(self, client_id: int) -> list[Row]:
+        result = await self.session.execute(_LIST_FOR_CLIENT_RAW, {"client_id": client_id})
+        return result.all()
+
+    async def list_for_project_raw(self, project_id: int) -> list[Row]:
+        result = await self.session.execute(_LIST_FOR_PROJECT_RAW, {"project_id": project_id})
+        return result.all()
 
     async def get(self, account_id: int) -> AvitoAccount | None:
         result = await self.session.execute(select(AvitoAccount).where(AvitoAccount.id == account_id))
         return result.scalar_one_or_none()
 
+    async def get_with_project_and_bot(
+        self, account_id: int
+    ) -> tuple[AvitoAccount, Project | None, Bot | None] | None:
+        result = await self.session.execute(_GET_WITH_PROJECT_AND_BOT.where(AvitoAccount.id == account_id))
+        row = result.one_or_none()
+        return tuple(row) if row is not None else None
+
     async def list_for_project(self, project_id: int) -> list[AvitoAccount]:
         result = await self.session.execute(select(AvitoAccount).where(AvitoAccount.project_id == project_id))
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     async def create(
         self,
@@ -35,7 +79,7 @@ class AvitoAccountRepository:
         bot_id: int | None = None,
         monitoring_enabled: bool = True,
     ) -> AvitoAccount:
-        webhook_secret = secrets.token_urlsafe(16)
+        webhook_secret = fresh_token()
         account = AvitoAccount(
             client_id=client_id,
             project_id=project_id,
@@ -49,36 +93,29 @@ class AvitoAccountRepository:
             webhook_secret=webhook_secret,
         )
         self.session.add(account)
-        await self.session.commit()
-        await self.session.refresh(account)
+        await flush_or_commit(self.session)
         return account
 
     async def update(self, account: AvitoAccount, **kwargs) -> AvitoAccount:
         for key, value in kwargs.items():
-            if hasattr(account, key):
+            if key in _AVITO_COLS:
                 setattr(account, key, value)
-        from datetime import datetime
-
-        account.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(account)
+        await flush_or_commit(self.session)
         return account
 
-    async def list_by_bot(self, bot_id: int) -> list[AvitoAccount]:
-        result = await self.session.execute(select(AvitoAccount).where(AvitoAccount.bot_id == bot_id))
-        return list(result.scalars().all())
+    async def detach_bot(self, bot_id: int) -> None:
+        await self.session.execute(update(AvitoAccount).where(AvitoAccount.bot_id == bot_id).values(bot_id=None))
+        await flush_or_commit(self.session)
 
     async def delete(self, account: AvitoAccount) -> None:
-        await self.session.delete(account)
-        await self.session.commit()
+        await self.session.execute(delete(AvitoAccount).where(AvitoAccount.id == account.id))
+        await flush_or_commit(self.session)
 
     async def ensure_secret(self, account: AvitoAccount) -> AvitoAccount:
         if account.webhook_secret:
             return account
-        account.webhook_secret = secrets.token_urlsafe(16)
-        account.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(account)
+        account.webhook_secret = fresh_token()
+        await flush_or_commit(self.session)
         return account
 
     async def set_webhook_status(
@@ -92,7 +129,5 @@ class AvitoAccountRepository:
         account.webhook_enabled = enabled
         account.webhook_url = url
         account.webhook_last_error = last_error
-        account.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(account)
+        await flush_or_commit(self.session)
         return account
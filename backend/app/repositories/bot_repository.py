@@ -1,9 +1,21 @@
-import secrets
-
-from sqlalchemy import select
+from sqlalchemy import Row, bindparam, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.row_cache import RowCache
+from app.db.session import flush_or_commit
 from app.models.bot import Bot
+from app.utils.tokens import fresh_token
+
+
+_BOT_COLS = frozenset(column.name for column in Bot.__table__.columns)
+
+_LIST_FOR_CLIENT = select(Bot).where(Bot.client_id == bindparam("client_id"))
+_LIST_COLS = (Bot.id, Bot.client_id, Bot.bot_username, Bot.status, Bot.group_chat_id, Bot.topic_mode, Bot.created_at)
+_LIST_FOR_CLIENT_RAW = select(*_LIST_COLS).where(Bot.client_id == bindparam("client_id"))
+_GET_BY_ID = select(Bot).where(Bot.id == bindparam("bot_id"))
+_GET_BY_TOKEN = select(Bot).where(Bot.token == bindparam("token")).limit(1)
+
+bot_cache: RowCache[Bot] = RowCache(Bot, ttl=5, maxsize=2048)
 
 
 class BotRepository:
@@ -11,15 +23,25 @@ class BotRepository:
         self.session = session
 
     async def list_for_client(self, client_id: int) -> list[Bot]:
-        result = await self.session.execute(select(Bot).where(Bot.client_id == client_id))
-        return list(result.scalars().all())
+        result = await self.session.execute(_LIST_FOR_CLIENT, {"client_id": client_id})
+        return result.scalars().all()
+
+    async def list_for_client_raw(self, client_id: int) -> list[Row]:
+        result = await self.session.execute(_LIST_FOR_CLIENT_RAW, {"client_id": client_id})
+        return result.all()
 
     async def get(self, bot_id: int) -> Bot | None:
-        result = await self.session.execute(select(Bot).where(Bot.id == bot_id))
-        return result.scalar_one_or_none()
+        cached = await bot_cache.get(self.session, bot_id)
+        if cached is not None:
+            return cached
+        result = await self.session.execute(_GET_BY_ID, {"bot_id": bot_id})
+        bot = result.scalar_one_or_none()
+        if bot is not None:
+            bot_cache.store(bot_id, bot)
+        return bot
 
     async def get_by_token(self, token: str) -> Bot | None:
-        result = await self.session.execute(select(Bot).where(Bot.token == token).limit(1))
+        result = await self.session.execute(_GET_BY_TOKEN, {"token": token})
         return result.scalar_one_or_none()
 
     async def create(
@@ -36,28 +58,38 @@ class BotRepository:
             bot_username=bot_username,
             group_chat_id=group_chat_id,
             topic_mode=topic_mode,
-            webhook_secret=secrets.token_urlsafe(16),
+            webhook_secret=fresh_token(),
         )
         self.session.add(bot)
-        await self.session.commit()
-        await self.session.refresh(bot)
+        await flush_or_commit(self.session)
         return bot
 
     async def update(self, bot: Bot, **kwargs) -> Bot:
         for key, value in kwargs.items():
-            if value is not None and hasattr(bot, key):
+            if value is not None and key in _BOT_COLS:
                 setattr(bot, key, value)
-        from datetime import datetime
-
-        bot.updated_at = datetime.utcnow()
         if not bot.webhook_secret:
-            import secrets
+            bot.webhook_secret = fresh_token()
+        bot_cache.invalidate(bot.id)
+        await flush_or_commit(self.session)
+        return bot
 
-            bot.webhook_secret = secrets.token_urlsafe(16)
-        await self.session.commit()
-        await self.session.refresh(bot)
+    async def update_if_owned(self, bot_id: int, client_id: int, **kwargs) -> Bot | None:
+        values = {key: value for key, value in kwargs.items() if value is not None and key in _BOT_COLS}
+        values.setdefault("webhook_secret", func.coalesce(func.nullif(Bot.webhook_secret, ""), fresh_token()))
+        bot_cache.invalidate(bot_id)
+        result = await self.session.execute(
+            update(Bot)
+            .where(Bot.id == bot_id, Bot.client_id == client_id)
+            .values(**values)
+            .returning(Bot)
+            .execution_options(populate_existing=True)
+        )
+        bot = result.scalar_one_or_none()
+        await flush_or_commit(self.session)
         return bot
 
     async def delete(self, bot: Bot) -> None:
+        bot_cache.invalidate(bot.id)
         await self.session.delete(bot)
-        await self.session.commit()
+        await flush_or_commit(self.session)
@@ -1,9 +1,37 @@
-from sqlalchemy import select
+from __future__ import annotations
+
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.row_cache import RowCache
+from app.db.session import flush_or_commit
 from app.models.client import Client
 
 
+_CLIENT_COLS = frozenset(column.name for column in Client.__table__.columns)
+_LIST_CLIENTS = select(Client)
+_LIST_COLS = (
+    Client.id,
+    Client.name,
+    Client.status,
+    Client.plan,
+    Client.created_at,
+    Client.filter_keywords,
+    Client.require_reply_for_avito,
+    Client.hide_system_messages,
+    Client.auto_reply_enabled,
+    Client.auto_reply_always,
+    Client.auto_reply_start_time,
+    Client.auto_reply_end_time,
+    Client.auto_reply_timezone,
+    Client.auto_reply_text,
+)
+_LIST_CLIENTS_RAW = select(*_LIST_COLS)
+_GET_BY_NAME = select(Client).where(Client.name == bindparam("name"))
+
+client_cache: RowCache[Client] = RowCache(Client, ttl=30)
+
+
 class ClientRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -36,29 +64,34 @@ class ClientRepository:
             auto_reply_text=auto_reply_text,
         )
         self.session.add(client)
-        await self.session.commit()
-        await self.session.refresh(client)
+        await flush_or_commit(self.session)
         return client
 
     async def update(self, client: Client, **kwargs) -> Client:
         for key, value in kwargs.items():
-            if hasattr(client, key):
+            if key in _CLIENT_COLS:
                 setattr(client, key, value)
-        from datetime import datetime
-
-        client.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(client)
+        client_cache.invalidate(client.id)
+        await flush_or_commit(self.session)
         return client
 
     async def get_by_id(self, client_id: int) -> Client | None:
-        result = await self.session.execute(select(Client).where(Client.id == client_id))
-        return result.scalar_one_or_none()
+        cached = await client_cache.get(self.session, client_id)
+        if cached is not None:
+            return cached
+        client = await self.session.get(Client, client_id)
+        if client is not None:
+            client_cache.store(client_id, client)
+        return client
 
     async def list(self) -> list[Client]:
-        result = await self.session.execute(select(Client))
-        return list(result.scalars().all())
+        result = await self.session.execute(_LIST_CLIENTS)
+        return result.scalars().all()
+
+    async def list_raw(self) -> list[Row]:
+        result = await self.session.execute(_LIST_CLIENTS_RAW)
+        return result.all()
 
     async def get_by_name(self, name: str) -> Client | None:
-        result = await self.session.execute(select(Client).where(Client.name == name))
+        result = await self.session.execute(_GET_BY_NAME, {"name": name})
         return result.scalar_one_or_none()
@@ -1,72 +1,195 @@
-from datetime import datetime
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any
 
-from sqlalchemy import select, update
+from sqlalchemy import Integer, Row, any_, bindparam, delete, func, inspect, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.db.session import flush_or_commit, update_columns, upsert_insert
 from app.models.dialog import Dialog
+from app.models.message import Message
+from app.models.personal_telegram_account import PersonalTelegramAccount
 from app.models.enums import DialogSource
 
 
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+_CACHE_KEY = "_dialog_cache"
+_NATURAL_KEY = ("client_id", "avito_dialog_id", "source")
+_INSERT_COLS = tuple(column.name for column in Dialog.__table__.columns if column.name != "id")
+_SERVER_FILLED_COLS = frozenset(
+    column.name for column in Dialog.__table__.columns if column.server_default is not None or column.onupdate is not None
+)
+
+_DELETE_CHUNK = 1000
+_DELETE_MANY = (
+    delete(Message).where(Message.dialog_id.in_(bindparam("ids", expanding=True))),
+    delete(Dialog).where(Dialog.id.in_(bindparam("ids", expanding=True))),
+)
+_DELETE_MANY_PG = (
+    delete(Message).where(Message.dialog_id == any_(bindparam("ids", type_=ARRAY(Integer)))),
+    delete(Dialog).where(Dialog.id == any_(bindparam("ids", type_=ARRAY(Integer)))),
+)
+
+_LIST_COLS = (
+    Dialog.id,
+    Dialog.client_id,
+    Dialog.source,
+    Dialog.avito_account_id,
+    Dialog.telegram_source_id,
+    Dialog.bot_id,
+    Dialog.avito_dialog_id,
+    Dialog.telegram_chat_id,
+    Dialog.telegram_topic_id,
+    Dialog.state,
+    Dialog.last_message_at,
+    Dialog.created_at,
+    Dialog.external_reference,
+    Dialog.external_display_name,
+    Dialog.external_username,
+)
+_LIST_FOR_CLIENT_RAW = select(*_LIST_COLS).where(Dialog.client_id == bindparam("client_id"))
+
+_GET_BY_AVITO = select(Dialog).where(
+    Dialog.client_id == bindparam("client_id"),
+    Dialog.avito_dialog_id == bindparam("avito_dialog_id"),
+    Dialog.source == DialogSource.avito.value,
+)
+_GET_ID_BY_AVITO = select(Dialog.id).where(
+    Dialog.client_id == bindparam("client_id"),
+    Dialog.avito_dialog_id == bindparam("avito_dialog_id"),
+    Dialog.source == DialogSource.avito.value,
+)
+_GET_BY_TOPIC = (
+    select(Dialog)
+    .where(Dialog.bot_id == bindparam("bot_id"), Dialog.telegram_topic_id == bindparam("topic_id"))
+    .order_by(
+        (Dialog.source == DialogSource.telegram.value).desc(),
+        Dialog.updated_at.desc(),
+    )
+    .limit(1)
+)
+_GET_BY_NATURAL_KEY = select(Dialog).where(
+    Dialog.client_id == bindparam("client_id"),
+    Dialog.avito_dialog_id == bindparam("avito_dialog_id"),
+    Dialog.source == bindparam("source"),
+)
+_GET_BY_ACCOUNT_AND_AVITO_ID = select(Dialog).where(
+    Dialog.avito_account_id == bindparam("avito_account_id"),
+    Dialog.avito_dialog_id == bindparam("avito_dialog_id"),
+    Dialog.source == DialogSource.avito.value,
+)
+
+
+def _with_relations(stmt, load: Sequence[str]):
+    for name in load:
+        stmt = stmt.options(selectinload(getattr(Dialog, name)))
+    return stmt
+
+
 class DialogRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @property
+    def _cache(self) -> dict[tuple, Dialog]:
+        return self.session.info.setdefault(_CACHE_KEY, {})
+
+    def _cached(self, key: tuple) -> Dialog | None:
+        dialog = self._cache.get(key)
+        if dialog is None:
+            return None
+        state = inspect(dialog)
+        if state.detached or state.expired_attributes:
+            self._cache.pop(key, None)
+            return None
+        return dialog
+
+    def _remember(self, key: tuple, dialog: Dialog | None) -> Dialog | None:
+        if dialog is not None:
+            self._cache[key] = dialog
+        return dialog
+
+    def _forget(self, dialog: Dialog) -> None:
+        cache = self.session.info.get(_CACHE_KEY)
+        if not cache:
+            return
+        for key in [key for key, value in cache.items() if value is dialog]:
+            del cache[key]
+
+    def _forget_all(self) -> None:
+        self.session.info.pop(_CACHE_KEY, None)
+
     async def get_by_avito(self, client_id: int, avito_dialog_id: str) -> Dialog | None:
+        key = ("avito", client_id, avito_dialog_id)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
         result = await self.session.execute(
-            select(Dialog).where(
-                Dialog.client_id == client_id,
-                Dialog.avito_dialog_id == avito_dialog_id,
-                Dialog.source == DialogSource.avito.value,
-            )
+            _GET_BY_AVITO,
+            {"client_id": client_id, "avito_dialog_id": avito_dialog_id},
         )
-        return result.scalar_one_or_none()
+        return self._remember(key, result.scalar_one_or_none())
 
-    async def get_by_topic(self, bot_id: int, topic_id: str) -> Dialog | None:
-        stmt = (
-            select(Dialog)
-            .where(Dialog.bot_id == bot_id, Dialog.telegram_topic_id == topic_id)
-            .order_by(
-                (Dialog.source == DialogSource.telegram.value).desc(),
-                Dialog.updated_at.desc(),
-            )
-            .limit(1)
+    async def get_dialog_id_by_avito(self, client_id: int, avito_dialog_id: str) -> int | None:
+        result = await self.session.execute(
+            _GET_ID_BY_AVITO,
+            {"client_id": client_id, "avito_dialog_id": avito_dialog_id},
         )
-        result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def list_for_client(self, client_id: int) -> list[Dialog]:
-        result = await self.session.execute(select(Dialog).where(Dialog.client_id == client_id))
-        return list(result.scalars().all())
+    async def get_by_topic(self, bot_id: int, topic_id: str) -> Dialog | None:
+        key = ("topic", bot_id, topic_id)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        result = await self.session.execute(_GET_BY_TOPIC, {"bot_id": bot_id, "topic_id": topic_id})
+        return self._remember(key, result.scalar_one_or_none())
+
+    async def list_for_client(self, client_id: int, *, load: Sequence[str] = ()) -> list[Dialog]:
+        result = await self.session.execute(_with_relations(select(Dialog).where(Dialog.client_id == client_id), load))
+        return result.scalars().all()
+
+    async def list_for_client_raw(self, client_id: int) -> list[Row]:
+        result = await self.session.execute(_LIST_FOR_CLIENT_RAW, {"client_id": client_id})
+        return result.all()
 
     async def get(self, dialog_id: int) -> Dialog | None:
         result = await self.session.execute(select(Dialog).where(Dialog.id == dialog_id))
         return result.scalar_one_or_none()
 
+    async def get_fresh(self, dialog_id: int) -> Dialog | None:
+        return await self.session.get(Dialog, dialog_id, populate_existing=True)
+
     async def get_by_account_and_avito_id(self, avito_account_id: int, avito_dialog_id: str) -> Dialog | None:
+        key = ("account", avito_account_id, avito_dialog_id)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
         result = await self.session.execute(
-            select(Dialog).where(
-                Dialog.avito_account_id == avito_account_id,
-                Dialog.avito_dialog_id == avito_dialog_id,
-                Dialog.source == DialogSource.avito.value,
-            )
+            _GET_BY_ACCOUNT_AND_AVITO_ID,
+            {"avito_account_id": avito_account_id, "avito_dialog_id": avito_dialog_id},
         )
-        return result.scalar_one_or_none()
+        return self._remember(key, result.scalar_one_or_none())
 
-    async def list_for_avito_account(self, account_id: int) -> list[Dialog]:
-        result = await self.session.execute(
-            select(Dialog).where(
-                Dialog.avito_account_id == account_id,
-                Dialog.source == DialogSource.avito.value,
-            )
+    async def list_for_avito_account(self, account_id: int, *, load: Sequence[str] = ()) -> list[Dialog]:
+        stmt = select(Dialog).where(
+            Dialog.avito_account_id == account_id,
+            Dialog.source == DialogSource.avito.value,
         )
-        return list(result.scalars().all())
+        result = await self.session.execute(_with_relations(stmt, load))
+        return result.scalars().all()
 
-    async def list_for_bot(self, bot_id: int) -> list[Dialog]:
-        result = await self.session.execute(select(Dialog).where(Dialog.bot_id == bot_id))
-        return list(result.scalars().all())
+    async def list_for_bot(self, bot_id: int, *, load: Sequence[str] = ()) -> list[Dialog]:
+        result = await self.session.execute(_with_relations(select(Dialog).where(Dialog.bot_id == bot_id), load))
+        return result.scalars().all()
 
-    async def list_for_personal_account(self, account_id: int) -> list[Dialog]:
-        result = await self.session.execute(
+    async def list_for_personal_account(self, account_id: int, *, load: Sequence[str] = ()) -> list[Dialog]:
+        stmt = (
             select(Dialog)
             .where(
                 Dialog.personal_account_id == account_id,
@@ -74,7 +197,8 @@ class DialogRepository:
             )
             .order_by(Dialog.updated_at.desc())
         )
-        return list(result.scalars().all())
+        result = await self.session.execute(_with_relations(stmt, load))
+        return result.scalars().all()
 
     async def get_recent_by_chat(
         self,
@@ -126,37 +250,83 @@ class DialogRepository:
         telegram_chat_id: str | None,
         telegram_topic_id: str | None,
         telegram_source_id: int | None = None,
+        personal_account_id: int | None = None,
         external_reference: str | None = None,
         external_display_name: str | None = None,
         external_username: str | None = None,
     ) -> Dialog:
-        dialog = Dialog(
+        dialog = self._build(
             client_id=client_id,
             project_id=project_id,
             avito_account_id=avito_account_id,
-            source=source.value if isinstance(source, DialogSource) else source,
+            source=source,
             telegram_source_id=telegram_source_id,
+            personal_account_id=personal_account_id,
             bot_id=bot_id,
             avito_dialog_id=avito_dialog_id,
             telegram_chat_id=telegram_chat_id,
             telegram_topic_id=telegram_topic_id,
-            last_message_at=datetime.utcnow(),
-            topic_intro_sent=False,
             external_reference=external_reference,
             external_display_name=external_display_name,
             external_username=external_username,
         )
         self.session.add(dialog)
-        await self.session.commit()
-        await self.session.refresh(dialog)
+        await flush_or_commit(self.session)
         return dialog
 
+    async def get_or_create(self, **fields: Any) -> tuple[Dialog, bool]:
+        insert = upsert_insert(self.session)
+        if insert is None:
+            existing = await self._get_by_natural_key(fields)
+            if existing is not None:
+                return existing, False
+            return await self.create(**fields), True
+
+        dialog = self._build(**fields)
+        values = {name: getattr(dialog, name) for name in _INSERT_COLS}
+        values = {
+            name: value for name, value in values.items() if value is not None or name not in _SERVER_FILLED_COLS
+        }
+        result = await self.session.scalars(
+            insert(Dialog).values(**values).on_conflict_do_nothing(index_elements=_NATURAL_KEY).returning(Dialog)
+        )
+        created = result.one_or_none()
+        if created is not None:
+            await flush_or_commit(self.session)
+            return created, True
+        return await self._get_by_natural_key(values), False
+
+    async def _get_by_natural_key(self, fields: dict[str, Any]) -> Dialog | None:
+        source = fields.get("source", DialogSource.avito)
+        result = await self.session.execute(
+            _GET_BY_NATURAL_KEY,
+            {
+                "client_id": fields["client_id"],
+                "avito_dialog_id": fields["avito_dialog_id"],
+                "source": source.value if isinstance(source, DialogSource) else source,
+            },
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    def _build(*, source: DialogSource | str = DialogSource.avito, **fields: Any) -> Dialog:
+        return Dialog(
+            source=source.value if isinstance(source, DialogSource) else source,
+            last_message_at=_now(),
+            topic_intro_sent=False,
+            **fields,
+        )
+
     async def get_by_telegram_source(
         self,
         *,
         telegram_source_id: int,
         external_reference: str,
     ) -> Dialog | None:
+        key = ("telegram", telegram_source_id, external_reference)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
         result = await self.session.execute(
             select(Dialog).where(
                 Dialog.telegram_source_id == telegram_source_id,
@@ -164,7 +334,7 @@ class DialogRepository:
                 Dialog.source == DialogSource.telegram.value,
             )
         )
-        return result.scalar_one_or_none()
+        return self._remember(key, result.scalar_one_or_none())
 
     async def get_by_personal_account(
         self,
@@ -181,79 +351,116 @@ class DialogRepository:
         )
         return result.scalar_one_or_none()
 
-    async def list_for_telegram_source(self, telegram_source_id: int) -> list[Dialog]:
-        result = await self.session.execute(
-            select(Dialog).where(
-                Dialog.telegram_source_id == telegram_source_id,
-                Dialog.source == DialogSource.telegram.value,
-            )
+    async def list_for_telegram_source(self, telegram_source_id: int, *, load: Sequence[str] = ()) -> list[Dialog]:
+        stmt = select(Dialog).where(
+            Dialog.telegram_source_id == telegram_source_id,
+            Dialog.source == DialogSource.telegram.value,
         )
-        return list(result.scalars().all())
+        result = await self.session.execute(_with_relations(stmt, load))
+        return result.scalars().all()
 
-    async def touch(self, dialog: Dialog) -> Dialog:
-        dialog.last_message_at = datetime.utcnow()
-        dialog.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(dialog)
+    async def _update_fields(self, dialog: Dialog, **values) -> Dialog:
+        await update_columns(self.session, dialog, values)
+        await flush_or_commit(self.session)
         return dialog
 
+    async def touch(self, dialog: Dialog) -> Dialog:
+        self._forget(dialog)
+        return await self._update_fields(dialog, last_message_at=_now())
+
     async def mark_auto_reply_sent(self, dialog: Dialog, timestamp: datetime) -> Dialog:
-        dialog.auto_reply_last_sent_at = timestamp
-        dialog.auto_reply_scheduled_at = None
-        dialog.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(dialog)
-        return dialog
+        return await self._update_fields(
+            dialog,
+            auto_reply_last_sent_at=timestamp,
+            auto_reply_scheduled_at=None,
+        )
 
     async def set_auto_reply_schedule(self, dialog: Dialog, scheduled_at: datetime | None) -> Dialog:
-        dialog.auto_reply_scheduled_at = scheduled_at
-        dialog.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(dialog)
-        return dialog
+        return await self._update_fields(dialog, auto_reply_scheduled_at=scheduled_at)
 
     async def clear_auto_reply_schedule(self, dialog: Dialog) -> Dialog:
         if dialog.auto_reply_scheduled_at is None:
             return dialog
-        dialog.auto_reply_scheduled_at = None
-        dialog.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(dialog)
-        return dialog
+        return await self._update_fields(dialog, auto_reply_scheduled_at=None)
 
     async def reset_auto_reply_marks_for_client(self, client_id: int) -> None:
+        self._forget_all()
         await self.session.execute(
             update(Dialog)
             .where(Dialog.client_id == client_id)
             .values(
                 auto_reply_last_sent_at=None,
                 auto_reply_scheduled_at=None,
-                updated_at=datetime.utcnow(),
             )
         )
-        await self.session.commit()
+        await flush_or_commit(self.session)
+
+    async def detach_personal_account(self, account_id: int, client_id: int) -> None:
+        self._forget_all()
+        account_name = (
+            select(PersonalTelegramAccount.display_name)
+            .where(PersonalTelegramAccount.id == account_id)
+            .scalar_subquery()
+        )
+        await self.session.execute(
+            update(Dialog)
+            .where(Dialog.personal_account_id == account_id, Dialog.client_id == client_id)
+            .values(
+                personal_account_id=None,
+                external_display_name=func.coalesce(Dialog.external_display_name, account_name),
+            )
+        )
+        await flush_or_commit(self.session)
 
     async def reset_auto_reply_marks_for_project(self, project_id: int) -> None:
+        self._forget_all()
         await self.session.execute(
             update(Dialog)
             .where(Dialog.project_id == project_id)
             .values(
                 auto_reply_last_sent_at=None,
                 auto_reply_scheduled_at=None,
-                updated_at=datetime.utcnow(),
             )
         )
-        await self.session.commit()
+        await flush_or_commit(self.session)
 
     async def set_topic(self, dialog: Dialog, topic_id: str | None) -> Dialog:
-        dialog.telegram_topic_id = topic_id
+        self._forget(dialog)
+        values = {"telegram_topic_id": topic_id}
         if topic_id:
-            dialog.topic_intro_sent = False
-        dialog.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(dialog)
-        return dialog
+            values["topic_intro_sent"] = False
+        return await self._update_fields(dialog, **values)
 
     async def delete(self, dialog: Dialog) -> None:
-        await self.session.delete(dialog)
-        await self.session.commit()
+        await self.delete_many([dialog.id])
+
+    async def delete_many(self, dialog_ids: Sequence[int]) -> None:
+        if not dialog_ids:
+            return
+        self._forget_all()
+        ids = list(dialog_ids)
+        statements = _DELETE_MANY_PG if self.session.get_bind().dialect.name == "postgresql" else _DELETE_MANY
+        for start in range(0, len(ids), _DELETE_CHUNK):
+            chunk = {"ids": ids[start:start + _DELETE_CHUNK]}
+            for stmt in statements:
+                await self.session.execute(stmt, chunk)
+        await flush_or_commit(self.session)
+
+    async def delete_for_client(self, client_id: int) -> None:
+        await self._delete_matching(Dialog.client_id == client_id)
+
+    async def delete_for_avito_account(self, account_id: int) -> None:
+        await self._delete_matching(Dialog.avito_account_id == account_id)
+
+    async def delete_for_bot(self, bot_id: int) -> None:
+        await self._delete_matching(Dialog.bot_id == bot_id)
+
+    async def delete_for_telegram_source(self, telegram_source_id: int) -> None:
+        await self._delete_matching(Dialog.telegram_source_id == telegram_source_id)
+
+    async def _delete_matching(self, condition) -> None:
+        self._forget_all()
+        dialog_ids = select(Dialog.id).where(condition).scalar_subquery()
+        await self.session.execute(delete(Message).where(Message.dialog_id.in_(dialog_ids)))
+        await self.session.execute(delete(Dialog).where(condition))
+        await flush_or_commit(self.session)
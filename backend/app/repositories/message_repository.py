@@ -1,13 +1,44 @@
-import json
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
 
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Any
 
-from sqlalchemy import delete, select, update
+import orjson
+from sqlalchemy import Integer, RowMapping, any_, bindparam, delete, exists, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.session import flush_or_commit, update_columns
 from app.models.message import Message
-from app.models.enums import MessageDirection
+from app.models.enums import MessageDirection, MessageStatus
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+_GET_BY_SOURCE = (
+    select(Message)
+    .where(
+        Message.direction == bindparam("direction"),
+        Message.source_message_id == bindparam("source_message_id"),
+    )
+    .order_by(Message.id.desc())
+    .limit(1)
+)
+
+_MSG_COLS = (
+    Message.id,
+    Message.direction,
+    Message.body,
+    Message.status,
+    Message.created_at,
+    Message.attachments,
+)
+_DELETE_CHUNK = 1000
+_DELETE_FOR_DIALOGS = delete(Message).where(Message.dialog_id.in_(bindparam("ids", expanding=True)))
+_DELETE_FOR_DIALOGS_PG = delete(Message).where(Message.dialog_id == any_(bindparam("ids", type_=ARRAY(Integer))))
+_LIST_RAW = select(*_MSG_COLS).where(Message.dialog_id == bindparam("dialog_id")).order_by(Message.id)
 
 
 class MessageRepository:
@@ -27,21 +58,59 @@ class MessageRepository:
         is_auto_reply: bool = False,
         is_client_message: bool = False,
     ) -> Message:
-        message = Message(
-            dialog_id=dialog_id,
-            direction=direction,
-            source_message_id=source_message_id,
-            body=body,
-            attachments=self._serialize_attachments(attachments),
-            status=status,
-            telegram_message_id=telegram_message_id,
-            is_auto_reply=is_auto_reply,
-            is_client_message=is_client_message,
+        messages = await self.bulk_create(
+            [
+                {
+                    "dialog_id": dialog_id,
+                    "direction": direction,
+                    "source_message_id": source_message_id,
+                    "body": body,
+                    "attachments": attachments,
+                    "status": status,
+                    "telegram_message_id": telegram_message_id,
+                    "is_auto_reply": is_auto_reply,
+                    "is_client_message": is_client_message,
+                }
+            ]
         )
-        self.session.add(message)
-        await self.session.commit()
-        await self.session.refresh(message)
-        return message
+        return messages[0]
+
+    async def bulk_create(self, rows: Sequence[dict[str, Any]]) -> list[Message]:
+        if not rows:
+            return []
+        result = await self.session.scalars(
+            insert(Message).returning(Message, sort_by_parameter_order=True),
+            self._prepare_rows(rows),
+        )
+        messages = result.all()
+        await flush_or_commit(self.session)
+        return messages
+
+    async def bulk_insert(self, rows: Sequence[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        await self.session.execute(insert(Message), self._prepare_rows(rows))
+        await flush_or_commit(self.session)
+
+    def _prepare_rows(self, rows: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+        now = _now()
+        return [
+            {
+                "source_message_id": None,
+                "telegram_message_id": None,
+                "status": MessageStatus.pending.value,
+                "sent_at": None,
+                "delivered_at": None,
+                "retries": 0,
+                "is_auto_reply": False,
+                "is_client_message": False,
+                "created_at": now,
+                "updated_at": None,
+                **row,
+                "attachments": self._serialize_attachments(row.get("attachments")),
+            }
+            for row in rows
+        ]
 
     def _serialize_attachments(self, attachments: str | dict | Sequence | None) -> str | None:
         if attachments is None:
@@ -49,27 +118,50 @@ class MessageRepository:
         if isinstance(attachments, str):
             return attachments
         try:
-            return json.dumps(attachments, ensure_ascii=False)
-        except TypeError:
+            return orjson.dumps(attachments, option=orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError:
             raise TypeError("attachments must be JSON-serializable")
 
     async def list_for_dialog(self, dialog_id: int) -> list[Message]:
         result = await self.session.execute(select(Message).where(Message.dialog_id == dialog_id))
-        return list(result.scalars().all())
+        return result.scalars().all()
 
-    async def get_by_source(self, *, direction: str, source_message_id: str) -> Message | None:
-        query = (
+    async def list_for_dialog_raw(self, dialog_id: int) -> Sequence[RowMapping]:
+        result = await self.session.execute(_LIST_RAW, {"dialog_id": dialog_id})
+        return result.mappings().all()
+
+    async def iter_for_dialog(self, dialog_id: int, *, batch_size: int = 500) -> AsyncIterator[Message]:
+        stmt = (
             select(Message)
-            .where(
-                Message.direction == direction,
-                Message.source_message_id == source_message_id,
-            )
-            .order_by(Message.id.desc())
-            .limit(1)
+            .where(Message.dialog_id == dialog_id)
+            .order_by(Message.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for message in result.scalars():
+            yield message
+
+    async def get_fresh(self, message_id: int) -> Message | None:
+        return await self.session.get(Message, message_id, populate_existing=True)
+
+    async def get_by_source(self, *, direction: str, source_message_id: str) -> Message | None:
+        result = await self.session.execute(
+            _GET_BY_SOURCE,
+            {"direction": direction, "source_message_id": source_message_id},
         )
-        result = await self.session.execute(query)
         return result.scalars().first()
 
+    async def exists_by_source(self, *, direction: str, source_message_id: str) -> bool:
+        result = await self.session.execute(
+            select(
+                exists().where(
+                    Message.direction == direction,
+                    Message.source_message_id == source_message_id,
+                )
+            )
+        )
+        return bool(result.scalar())
+
     async def get_by_telegram(
         self,
         *,
@@ -78,25 +170,18 @@ class MessageRepository:
     ) -> Message | None:
         query = select(Message).where(Message.telegram_message_id == telegram_message_id)
         if direction is not None:
-            query = query.where(Message.direction == direction)
-        query = query.order_by(Message.id.desc()).limit(2)
-        result = await self.session.execute(query)
-        rows = result.scalars().all()
-        if not rows:
-            return None
-        if len(rows) > 1:
-            # Prefer matching direction == avito if available to disambiguate duplicates produced earlier
-            for row in rows:
-                if direction is not None and row.direction == direction:
-                    return row
-                if direction is None and row.is_client_message:
-                    return row
-        return rows[0]
-
-    async def delete_for_dialogs(self, dialog_ids: list[int]) -> None:
-        if not dialog_ids:
-            return
-        await self.session.execute(delete(Message).where(Message.dialog_id.in_(dialog_ids)))
+            query = query.where(Message.direction == direction).order_by(Message.id.desc())
+        else:
+            # Prefer the client-side copy when a telegram id was stored on both directions
+            query = query.order_by(Message.is_client_message.desc(), Message.id.desc())
+        result = await self.session.execute(query.limit(1))
+        return result.scalar_one_or_none()
+
+    async def delete_for_dialogs(self, dialog_ids: Sequence[int]) -> None:
+        ids = list(dialog_ids)
+        stmt = _DELETE_FOR_DIALOGS_PG if self.session.get_bind().dialect.name == "postgresql" else _DELETE_FOR_DIALOGS
+        for start in range(0, len(ids), _DELETE_CHUNK):
+            await self.session.execute(stmt, {"ids": ids[start:start + _DELETE_CHUNK]})
 
     async def get_last_by_direction(self, dialog_id: int, direction: MessageDirection) -> Message | None:
         result = await self.session.execute(
@@ -109,30 +194,28 @@ class MessageRepository:
 
     async def has_outgoing_since(self, dialog_id: int, since: datetime) -> bool:
         result = await self.session.execute(
-            select(Message.id)
-                .where(
+            select(
+                exists().where(
                     Message.dialog_id == dialog_id,
                     Message.direction == MessageDirection.telegram,
                     Message.is_auto_reply.is_(False),
                     Message.created_at >= since,
                 )
-                .limit(1)
+            )
         )
-        return result.scalar_one_or_none() is not None
+        return bool(result.scalar())
 
     async def mark_as_client_message(self, message: Message) -> Message:
         if message.is_client_message:
             return message
-        message.is_client_message = True
-        message.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(message)
+        await update_columns(self.session, message, {"is_client_message": True})
+        await flush_or_commit(self.session)
         return message
 
     async def mark_status(self, message_id: int, status: str) -> None:
         await self.session.execute(
             update(Message)
             .where(Message.id == message_id)
-            .values(status=status, updated_at=datetime.utcnow())
+            .values(status=status)
         )
-        await self.session.commit()
+        await flush_or_commit(self.session)
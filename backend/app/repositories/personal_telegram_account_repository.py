@@ -1,48 +1,100 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable, Sequence
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, Sequence
 
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 
+from app.db.session import flush_or_commit, update_columns
 from app.models.personal_telegram_account import PersonalTelegramAccount
 from app.models.enums import PersonalTelegramAccountStatus
 
 
+_ACCOUNT_COLS = frozenset(column.name for column in PersonalTelegramAccount.__table__.columns)
+_WITHOUT_SESSION_PAYLOAD = defer(PersonalTelegramAccount.session_payload, raiseload=True)
+
+_GET_BY_ID = select(PersonalTelegramAccount).where(PersonalTelegramAccount.id == bindparam("account_id"))
+_LIST_FOR_CLIENT = (
+    select(PersonalTelegramAccount)
+    .options(_WITHOUT_SESSION_PAYLOAD)
+    .where(PersonalTelegramAccount.client_id == bindparam("client_id"))
+    .order_by(PersonalTelegramAccount.created_at.desc())
+)
+_LIST_FOR_PROJECT = (
+    select(PersonalTelegramAccount)
+    .options(_WITHOUT_SESSION_PAYLOAD)
+    .where(
+        PersonalTelegramAccount.project_id == bindparam("project_id"),
+        PersonalTelegramAccount.client_id == bindparam("client_id"),
+    )
+    .order_by(PersonalTelegramAccount.created_at.desc())
+)
+_GET_OWNED = _GET_BY_ID.where(PersonalTelegramAccount.client_id == bindparam("client_id"))
+_DELETE_OWNED = (
+    delete(PersonalTelegramAccount)
+    .where(
+        PersonalTelegramAccount.id == bindparam("account_id"),
+        PersonalTelegramAccount.client_id == bindparam("client_id"),
+    )
+    .returning(PersonalTelegramAccount.id)
+)
+_FINGERPRINT = select(
+    func.max(func.coalesce(PersonalTelegramAccount.updated_at, PersonalTelegramAccount.created_at)),
+    func.count(PersonalTelegramAccount.id),
+).where(PersonalTelegramAccount.client_id == bindparam("client_id"))
+_FINGERPRINT_FOR_PROJECT = _FINGERPRINT.where(PersonalTelegramAccount.project_id == bindparam("project_id"))
+_LIST_ACTIVE = (
+    select(PersonalTelegramAccount)
+    .where(PersonalTelegramAccount.status == PersonalTelegramAccountStatus.active)
+    .order_by(PersonalTelegramAccount.updated_at.desc())
+)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class PersonalTelegramAccountRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get(self, account_id: int) -> PersonalTelegramAccount | None:
-        result = await self.session.execute(
-            select(PersonalTelegramAccount).where(PersonalTelegramAccount.id == account_id)
-        )
+        result = await self.session.execute(_GET_BY_ID, {"account_id": account_id})
         return result.scalar_one_or_none()
 
     async def list_for_client(self, client_id: int) -> list[PersonalTelegramAccount]:
-        result = await self.session.execute(
-            select(PersonalTelegramAccount)
-            .where(PersonalTelegramAccount.client_id == client_id)
-            .order_by(PersonalTelegramAccount.created_at.desc())
-        )
-        return list(result.scalars().all())
+        result = await self.session.execute(_LIST_FOR_CLIENT, {"client_id": client_id})
+        return result.scalars().all()
 
-    async def list_for_project(self, project_id: int) -> list[PersonalTelegramAccount]:
-        result = await self.session.execute(
-            select(PersonalTelegramAccount)
-            .where(PersonalTelegramAccount.project_id == project_id)
-            .order_by(PersonalTelegramAccount.created_at.desc())
-        )
-        return list(result.scalars().all())
+    async def list_for_project(self, project_id: int, client_id: int) -> list[PersonalTelegramAccount]:
+        result = await self.session.execute(_LIST_FOR_PROJECT, {"project_id": project_id, "client_id": client_id})
+        return result.scalars().all()
 
-    async def list_active(self) -> list[PersonalTelegramAccount]:
-        result = await self.session.execute(
-            select(PersonalTelegramAccount)
-            .where(PersonalTelegramAccount.status == PersonalTelegramAccountStatus.active)
-            .order_by(PersonalTelegramAccount.updated_at.desc())
-        )
-        return list(result.scalars().all())
+    async def fingerprint(self, client_id: int, project_id: int | None = None) -> tuple[datetime | None, int]:
+        if project_id is None:
+            result = await self.session.execute(_FINGERPRINT, {"client_id": client_id})
+        else:
+            result = await self.session.execute(_FINGERPRINT_FOR_PROJECT, {"client_id": client_id, "project_id": project_id})
+        last_changed, count = result.one()
+        return last_changed, count
+
+    async def iter_active(self, *, batch_size: int = 200) -> AsyncIterator[PersonalTelegramAccount]:
+        result = await self.session.stream_scalars(_LIST_ACTIVE.execution_options(yield_per=batch_size))
+        async for account in result:
+            yield account
+
+    async def iter_for_client(
+        self, client_id: int, project_id: int | None = None, *, batch_size: int = 200
+    ) -> AsyncIterator[PersonalTelegramAccount]:
+        if project_id is None:
+            stmt, params = _LIST_FOR_CLIENT, {"client_id": client_id}
+        else:
+            stmt, params = _LIST_FOR_PROJECT, {"client_id": client_id, "project_id": project_id}
+        result = await self.session.stream_scalars(stmt.execution_options(yield_per=batch_size), params)
+        async for account in result:
+            yield account
 
     async def create(
         self,
@@ -63,8 +115,7 @@ class PersonalTelegramAccountRepository:
             session_payload=session_payload,
         )
         self.session.add(account)
-        await self.session.commit()
-        await self.session.refresh(account)
+        await flush_or_commit(self.session)
         return account
 
     async def update(
@@ -72,13 +123,38 @@ class PersonalTelegramAccountRepository:
         account: PersonalTelegramAccount,
         **fields: object,
     ) -> PersonalTelegramAccount:
-        for key, value in fields.items():
-            setattr(account, key, value)
-        account.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(account)
+        values = {key: value for key, value in fields.items() if key in _ACCOUNT_COLS}
+        if not values:
+            return account
+        await update_columns(self.session, account, values)
+        await flush_or_commit(self.session)
+        return account
+
+    async def update_if_owned(self, account_id: int, client_id: int, **fields: object) -> PersonalTelegramAccount | None:
+        values = {key: value for key, value in fields.items() if key in _ACCOUNT_COLS}
+        if not values:
+            result = await self.session.execute(_GET_OWNED, {"account_id": account_id, "client_id": client_id})
+            return result.scalar_one_or_none()
+        result = await self.session.execute(
+            update(PersonalTelegramAccount)
+            .where(PersonalTelegramAccount.id == account_id, PersonalTelegramAccount.client_id == client_id)
+            .values(**values)
+            .returning(PersonalTelegramAccount)
+            .execution_options(populate_existing=True)
+        )
+        account = result.scalar_one_or_none()
+        await flush_or_commit(self.session)
         return account
 
+    async def delete_if_owned(self, account_id: int, client_id: int) -> bool:
+        result = await self.session.execute(
+            _DELETE_OWNED.execution_options(synchronize_session=False),
+            {"account_id": account_id, "client_id": client_id},
+        )
+        deleted = result.scalar_one_or_none() is not None
+        await flush_or_commit(self.session)
+        return deleted
+
     async def set_status(
         self,
         account: PersonalTelegramAccount,
@@ -88,27 +164,29 @@ class PersonalTelegramAccountRepository:
     ) -> PersonalTelegramAccount:
         account.status = status
         account.last_error = last_error
-        account.updated_at = datetime.utcnow()
         if status == PersonalTelegramAccountStatus.active:
-            account.last_connected_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(account)
+            account.last_connected_at = _now()
+        await flush_or_commit(self.session)
         return account
 
     async def bulk_set_status(
         self,
         accounts: Sequence[int],
         status: PersonalTelegramAccountStatus,
-    ) -> None:
+    ) -> list[int]:
         if not accounts:
-            return
-        await self.session.execute(
+            return []
+        result = await self.session.execute(
             update(PersonalTelegramAccount)
             .where(PersonalTelegramAccount.id.in_(accounts))
-            .values(status=status.value, updated_at=datetime.utcnow())
+            .values(status=status.value)
+            .returning(PersonalTelegramAccount.id)
+            .execution_options(synchronize_session=False)
         )
-        await self.session.commit()
+        updated_ids = result.scalars().all()
+        await flush_or_commit(self.session)
+        return updated_ids
 
     async def delete(self, account: PersonalTelegramAccount) -> None:
         await self.session.delete(account)
-        await self.session.commit()
+        await flush_or_commit(self.session)
@@ -1,45 +1,75 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable
+from typing import AsyncIterator, Iterable
 
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, bindparam, exists, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.row_cache import RowCache
+from app.db.session import flush_or_commit, update_columns
 from app.models.project import Project
 from app.models.enums import AutoReplyMode
 
 
+_PROJECT_COLS = frozenset(column.name for column in Project.__table__.columns)
+
+_LIST_FOR_CLIENT = (
+    select(Project).where(Project.client_id == bindparam("client_id")).order_by(Project.created_at.desc())
+)
+_GET_BY_ID = select(Project).where(Project.id == bindparam("project_id"))
+_OWNS = select(
+    exists().where(Project.id == bindparam("project_id"), Project.client_id == bindparam("client_id"))
+)
+_GET_BY_SLUG = select(Project).where(Project.client_id == bindparam("client_id"), Project.slug == bindparam("slug"))
+_GET_BY_BOT = select(Project).where(Project.bot_id == bindparam("bot_id"))
+_GET_MANY = select(Project).where(Project.id.in_(bindparam("ids", expanding=True))).order_by(Project.id)
+_GET_MANY_PG = select(Project).where(Project.id == any_(bindparam("ids", type_=ARRAY(Integer)))).order_by(Project.id)
+
+project_cache: RowCache[Project] = RowCache(Project, ttl=5, maxsize=2048)
+
+
 class ProjectRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def list_for_client(self, client_id: int) -> list[Project]:
-        stmt = select(Project).where(Project.client_id == client_id).order_by(Project.created_at.desc())
-        result = await self.session.execute(stmt)
-        return list(result.scalars().all())
+        result = await self.session.execute(_LIST_FOR_CLIENT, {"client_id": client_id})
+        return result.scalars().all()
 
     async def get(self, project_id: int) -> Project | None:
-        result = await self.session.execute(select(Project).where(Project.id == project_id))
-        return result.scalar_one_or_none()
+        cached = await project_cache.get(self.session, project_id)
+        if cached is not None:
+            return cached
+        result = await self.session.execute(_GET_BY_ID, {"project_id": project_id})
+        project = result.scalar_one_or_none()
+        if project is not None:
+            project_cache.store(project_id, project)
+        return project
+
+    async def owns(self, project_id: int, client_id: int) -> bool:
+        result = await self.session.execute(_OWNS, {"project_id": project_id, "client_id": client_id})
+        return bool(result.scalar())
 
     async def get_by_slug(self, client_id: int, slug: str) -> Project | None:
-        stmt = select(Project).where(Project.client_id == client_id, Project.slug == slug)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_GET_BY_SLUG, {"client_id": client_id, "slug": slug})
         return result.scalar_one_or_none()
 
     async def get_by_bot_id(self, bot_id: int) -> Project | None:
-        stmt = select(Project).where(Project.bot_id == bot_id)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_GET_BY_BOT, {"bot_id": bot_id})
         return result.scalar_one_or_none()
 
     async def get_many(self, project_ids: Iterable[int]) -> list[Project]:
+        return [project async for project in self.iter_many(project_ids)]
+
+    async def iter_many(self, project_ids: Iterable[int], *, batch_size: int = 500) -> AsyncIterator[Project]:
         ids = list(project_ids)
         if not ids:
-            return []
-        stmt = select(Project).where(Project.id.in_(ids))
-        result = await self.session.execute(stmt)
-        return list(result.scalars().all())
+            return
+        stmt = _GET_MANY_PG if self.session.get_bind().dialect.name == "postgresql" else _GET_MANY
+        result = await self.session.stream_scalars(stmt.execution_options(yield_per=batch_size), {"ids": ids})
+        async for project in result:
+            yield project
 
     async def create(
         self,
@@ -82,19 +112,19 @@ class ProjectRepository:
             topic_intro_template=topic_intro_template,
         )
         self.session.add(project)
-        await self.session.commit()
-        await self.session.refresh(project)
+        await flush_or_commit(self.session)
         return project
 
     async def update(self, project: Project, **updates) -> Project:
-        for key, value in updates.items():
-            if hasattr(project, key):
-                setattr(project, key, value)
-        project.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(project)
+        values = {key: value for key, value in updates.items() if key in _PROJECT_COLS}
+        if not values:
+            return project
+        project_cache.invalidate(project.id)
+        await update_columns(self.session, project, values)
+        await flush_or_commit(self.session)
         return project
 
     async def delete(self, project: Project) -> None:
+        project_cache.invalidate(project.id)
         await self.session.delete(project)
-        await self.session.commit()
+        await flush_or_commit(self.session)
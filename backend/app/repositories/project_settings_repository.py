@@ -1,34 +1,76 @@
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.session import flush_or_commit, update_columns, upsert_insert
 from app.core.config import settings as app_settings
+from app.core.row_cache import RowCache
 from app.models.settings import ProjectSettings
 
 
+_SETTINGS_COLS = frozenset(column.name for column in ProjectSettings.__table__.columns)
+_SETTINGS_KEY = "project_settings"
+_SETTINGS_ID = 1
+
+settings_cache: RowCache[ProjectSettings] = RowCache(ProjectSettings, ttl=30, maxsize=1)
+_load_lock = asyncio.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class ProjectSettingsRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get(self) -> ProjectSettings:
-        result = await self.session.execute(select(ProjectSettings).limit(1))
-        settings = result.scalar_one_or_none()
-        if settings is None:
-            settings = ProjectSettings(
-                master_bot_token=app_settings.master_bot_token or None,
-                master_bot_name=app_settings.master_bot_name or None,
-            )
+        cached = await settings_cache.get(self.session, _SETTINGS_KEY)
+        if cached is not None:
+            return cached
+        async with _load_lock:
+            cached = await settings_cache.get(self.session, _SETTINGS_KEY)
+            if cached is not None:
+                return cached
+            return await self._load()
+
+    async def _load(self) -> ProjectSettings:
+        settings = await self.session.get(ProjectSettings, _SETTINGS_ID)
+        if settings is not None:
+            settings_cache.store(_SETTINGS_KEY, settings)
+            return settings
+        return await self._create()
+
+    async def _create(self) -> ProjectSettings:
+        values = {
+            "id": _SETTINGS_ID,
+            "master_bot_token": app_settings.master_bot_token or None,
+            "master_bot_name": app_settings.master_bot_name or None,
+        }
+        insert = upsert_insert(self.session)
+        if insert is None:
+            settings = ProjectSettings(**values)
             self.session.add(settings)
-            await self.session.commit()
-            await self.session.refresh(settings)
+            await flush_or_commit(self.session)
+            return settings
+        result = await self.session.scalars(
+            insert(ProjectSettings)
+            .values(**values, created_at=_now())
+            .on_conflict_do_nothing(index_elements=["id"])
+            .returning(ProjectSettings)
+        )
+        settings = result.one_or_none()
+        if settings is None:
+            return await self.session.get(ProjectSettings, _SETTINGS_ID)
+        await flush_or_commit(self.session)
         return settings
 
     async def update(self, settings_obj: ProjectSettings, **kwargs) -> ProjectSettings:
-        for key, value in kwargs.items():
-            if hasattr(settings_obj, key):
-                setattr(settings_obj, key, value)
-        settings_obj.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(settings_obj)
+        values = {key: value for key, value in kwargs.items() if key in _SETTINGS_COLS}
+        if not values:
+            return settings_obj
+        settings_cache.invalidate()
+        await update_columns(self.session, settings_obj, values)
+        await flush_or_commit(self.session)
         return settings_obj
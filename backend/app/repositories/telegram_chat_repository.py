@@ -1,11 +1,19 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.session import flush_or_commit, update_columns, upsert_insert
 from app.models.telegram_chat import TelegramChat
 
 
+_CHAT_COLS = frozenset(column.name for column in TelegramChat.__table__.columns)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class TelegramChatRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -31,44 +39,45 @@ class TelegramChatRepository:
         status: str | None,
         is_member: bool,
     ) -> TelegramChat:
-        chat = await self.get(bot_id=bot_id, chat_id=chat_id)
-        now = datetime.utcnow()
-
-        if chat is None:
-            chat = TelegramChat(
-                bot_id=bot_id,
-                chat_id=chat_id,
-                title=title,
-                chat_type=chat_type,
-                username=username,
-                is_forum=is_forum,
-                is_active=is_member,
-                last_status=status,
-                joined_at=now if is_member else None,
-                left_at=None,
-                updated_at=now,
-            )
-            self.session.add(chat)
+        now = _now()
+        insert = upsert_insert(self.session)
+        stmt = insert(TelegramChat).values(
+            bot_id=bot_id,
+            chat_id=chat_id,
+            title=title,
+            chat_type=chat_type,
+            username=username,
+            is_forum=is_forum,
+            is_active=is_member,
+            last_status=status,
+            joined_at=now if is_member else None,
+            left_at=None,
+            created_at=now,
+            updated_at=now,
+        )
+        excluded = stmt.excluded
+        changes = {
+            "title": func.coalesce(func.nullif(excluded.title, ""), TelegramChat.title),
+            "chat_type": func.coalesce(func.nullif(excluded.chat_type, ""), TelegramChat.chat_type),
+            "username": func.coalesce(func.nullif(excluded.username, ""), TelegramChat.username),
+            "is_forum": func.coalesce(excluded.is_forum, TelegramChat.is_forum),
+            "last_status": func.coalesce(func.nullif(excluded.last_status, ""), TelegramChat.last_status),
+            "is_active": is_member,
+            "updated_at": now,
+        }
+        if is_member:
+            changes["joined_at"] = case((TelegramChat.is_active.is_(False), now), else_=TelegramChat.joined_at)
+            changes["left_at"] = case((TelegramChat.is_active.is_(False), None), else_=TelegramChat.left_at)
         else:
-            if title:
-                chat.title = title
-            chat.chat_type = chat_type or chat.chat_type
-            chat.username = username or chat.username
-            chat.is_forum = is_forum if is_forum is not None else chat.is_forum
-            chat.last_status = status or chat.last_status
-            if is_member:
-                if not chat.is_active:
-                    chat.joined_at = now
-                    chat.left_at = None
-                chat.is_active = True
-            else:
-                if chat.is_active:
-                    chat.left_at = now
-                chat.is_active = False
-            chat.updated_at = now
+            changes["left_at"] = case((TelegramChat.is_active.is_(True), now), else_=TelegramChat.left_at)
 
-        await self.session.commit()
-        await self.session.refresh(chat)
+        stmt = (
+            stmt.on_conflict_do_update(index_elements=["bot_id", "chat_id"], set_=changes)
+            .returning(TelegramChat)
+            .execution_options(populate_existing=True)
+        )
+        chat = (await self.session.scalars(stmt)).one()
+        await flush_or_commit(self.session)
         return chat
 
     async def list_active_for_bot(self, bot_id: int) -> list[TelegramChat]:
@@ -77,13 +86,12 @@ class TelegramChatRepository:
             .where(TelegramChat.bot_id == bot_id, TelegramChat.is_active.is_(True))
             .order_by(TelegramChat.title.asc(), TelegramChat.chat_id.asc())
         )
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     async def update_chat(self, chat: TelegramChat, **changes: object) -> TelegramChat:
-        for key, value in changes.items():
-            if hasattr(chat, key) and value is not None:
-                setattr(chat, key, value)
-        chat.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(chat)
+        values = {key: value for key, value in changes.items() if key in _CHAT_COLS and value is not None}
+        if not values:
+            return chat
+        await update_columns(self.session, chat, values)
+        await flush_or_commit(self.session)
         return chat
@@ -1,31 +1,45 @@
-import secrets
+from collections.abc import Sequence
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from app.db.session import flush_or_commit, update_columns
 from app.models.telegram_source import TelegramSource
 from app.models.enums import TelegramSourceStatus
 
 
+_SOURCE_COLS = frozenset(column.name for column in TelegramSource.__table__.columns)
+
+_GET_BY_TOKEN = select(TelegramSource).where(TelegramSource.token == bindparam("token"))
+
+
+def _with_relations(stmt, load: Sequence[str]):
+    for name in load:
+        stmt = stmt.options(joinedload(getattr(TelegramSource, name)))
+    return stmt
+
+
 class TelegramSourceRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def list_for_client(self, client_id: int) -> list[TelegramSource]:
         result = await self.session.execute(select(TelegramSource).where(TelegramSource.client_id == client_id))
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     async def list_for_project(self, project_id: int) -> list[TelegramSource]:
         result = await self.session.execute(select(TelegramSource).where(TelegramSource.project_id == project_id))
-        return list(result.scalars().all())
+        return result.scalars().all()
 
-    async def get(self, source_id: int) -> TelegramSource | None:
-        result = await self.session.execute(select(TelegramSource).where(TelegramSource.id == source_id))
+    async def get(self, source_id: int, *, load: Sequence[str] = ()) -> TelegramSource | None:
+        stmt = select(TelegramSource).where(TelegramSource.id == source_id)
+        result = await self.session.execute(_with_relations(stmt, load))
         return result.scalar_one_or_none()
 
     async def get_by_token(self, token: str) -> TelegramSource | None:
-        result = await self.session.execute(select(TelegramSource).where(TelegramSource.token == token).limit(1))
+        result = await self.session.execute(_GET_BY_TOKEN, {"token": token})
         return result.scalar_one_or_none()
 
     async def create(
@@ -48,26 +62,19 @@ class TelegramSourceRepository:
             display_name=display_name,
             description=description,
             status=TelegramSourceStatus.inactive,
-            webhook_secret=secrets.token_urlsafe(16),
         )
         self.session.add(source)
-        await self.session.commit()
-        await self.session.refresh(source)
+        await flush_or_commit(self.session)
         return source
 
     async def update(self, source: TelegramSource, **kwargs) -> TelegramSource:
-        for key, value in kwargs.items():
-            if hasattr(source, key) and value is not None:
-                setattr(source, key, value)
-        from datetime import datetime
-
-        source.updated_at = datetime.utcnow()
-        if not source.webhook_secret:
-            source.webhook_secret = secrets.token_urlsafe(16)
-        await self.session.commit()
-        await self.session.refresh(source)
+        values = {key: value for key, value in kwargs.items() if key in _SOURCE_COLS and value is not None}
+        if not values:
+            return source
+        await update_columns(self.session, source, values)
+        await flush_or_commit(self.session)
         return source
 
     async def delete(self, source: TelegramSource) -> None:
         await self.session.delete(source)
-        await self.session.commit()
+        await flush_or_commit(self.session)
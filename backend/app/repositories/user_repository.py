@@ -1,7 +1,8 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash
+from app.db.session import flush_or_commit
+from app.core.security import get_password_hash_async
 from app.models.enums import UserRole
 from app.models.user import User
 
@@ -10,9 +11,9 @@ class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_by_id(self, user_id: int) -> User | None:
-        result = await self.session.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+    @staticmethod
+    async def get_by_id(session: AsyncSession, user_id: int) -> User | None:
+        return await session.get(User, user_id)
 
     async def get_by_email(self, email: str) -> User | None:
         result = await self.session.execute(select(User).where(User.email == email))
@@ -23,16 +24,15 @@ class UserRepository:
         return result.scalar_one_or_none()
 
     async def create_admin(self, email: str, password: str, full_name: str | None = None) -> User:
-        admin = User(email=email, full_name=full_name, role=UserRole.admin, hashed_password=get_password_hash(password))
+        hashed_password = await get_password_hash_async(password)
+        admin = User(email=email, full_name=full_name, role=UserRole.admin, hashed_password=hashed_password)
         self.session.add(admin)
-        await self.session.commit()
-        await self.session.refresh(admin)
+        await flush_or_commit(self.session)
         return admin
 
     async def create(self, user: User, password: str | None = None) -> User:
         if password:
-            user.hashed_password = get_password_hash(password)
+            user.hashed_password = await get_password_hash_async(password)
         self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+        await flush_or_commit(self.session)
         return user
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
+from sqlalchemy import func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
@@ -13,19 +13,40 @@ from app.schemas.settings import ProjectSettingsResponse, ProjectSettingsUpdateR
 
 router = APIRouter()
 
+_SUMMARY_TABLES = {
+    "clients": Client,
+    "users": User,
+    "bots": Bot,
+    "avito_accounts": AvitoAccount,
+    "dialogs": Dialog,
+}
+_ESTIMATE_MIN_ROWS = 10_000
+_ESTIMATES = text(
+    "SELECT relname, reltuples::bigint AS estimate FROM pg_class "
+    "WHERE relkind = 'r' AND relnamespace = current_schema()::regnamespace AND relname = ANY(:tables)"
+)
+
+
+def _exact_counts(names: list[str]):
+    return select(
+        *(select(func.count(_SUMMARY_TABLES[name].id)).scalar_subquery().label(name) for name in names)
+    )
+
 
 @router.get("/summary")
 async def summary(
     session: AsyncSession = Depends(deps.get_db),
     _: object = Depends(deps.get_current_admin),
 ):
-    counts = {}
-    counts["clients"] = (await session.execute(select(func.count(Client.id)))).scalar()
-    counts["users"] = (await session.execute(select(func.count(User.id)))).scalar()
-    counts["bots"] = (await session.execute(select(func.count(Bot.id)))).scalar()
-    counts["avito_accounts"] = (await session.execute(select(func.count(AvitoAccount.id)))).scalar()
-    counts["dialogs"] = (await session.execute(select(func.count(Dialog.id)))).scalar()
-    return counts
+    counts: dict[str, int] = {}
+    if session.get_bind().dialect.name == "postgresql":
+        rows = await session.execute(_ESTIMATES, {"tables": list(_SUMMARY_TABLES)})
+        counts = {row.relname: row.estimate for row in rows if row.estimate >= _ESTIMATE_MIN_ROWS}
+    missing = [name for name in _SUMMARY_TABLES if name not in counts]
+    if missing:
+        row = (await session.execute(_exact_counts(missing))).one()
+        counts.update(row._mapping)
+    return {name: counts[name] for name in _SUMMARY_TABLES}
 
 
 @router.get("/settings", response_model=ProjectSettingsResponse)
@@ -46,5 +67,5 @@ async def update_settings(
 ):
     repo = ProjectSettingsRepository(session)
     settings = await repo.get()
-    updated = await repo.update(settings, **payload.model_dump(exclude_unset=True))
+    updated = await repo.update(settings, **{key: getattr(payload, key) for key in payload.__pydantic_fields_set__})
     return updated
@@ -3,10 +3,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
 from app.core.config import settings
+from app.core import user_cache
 from app.core.security import create_access_token
 from app.models.enums import UserRole
 from app.models.user import User
-from app.repositories.client_repository import ClientRepository
 from app.repositories.user_repository import UserRepository
 from app.schemas.auth import (
     AdminPasswordLoginRequest,
@@ -69,10 +69,7 @@ async def bootstrap_admin(payload: BootstrapAdminRequest, session: AsyncSession
 
 @router.post("/master/link", response_model=TelegramLinkResponse)
 async def create_login_link(payload: TelegramLinkRequest, session: AsyncSession = Depends(get_db)) -> TelegramLinkResponse:
-    try:
-        role = UserRole(payload.role)
-    except ValueError:
-        role = UserRole.manager
+    role = UserRole.from_value(payload.role, UserRole.manager)
     service = AuthService(session)
     link_token = await service.issue_telegram_token(payload.telegram_user_id, role)
     return TelegramLinkResponse(link_token=link_token)
@@ -83,37 +80,31 @@ async def exchange_link(payload: TelegramLinkExchangeRequest, session: AsyncSess
     service = AuthService(session)
     claims = service.validate_link_token(payload.token)
     telegram_user_id = claims["sub"]
-    desired_role = UserRole(claims.get("role", "manager"))
+    desired_role = UserRole.from_value(claims.get("role"), UserRole.manager)
 
     user_repo = UserRepository(session)
-    client_repo = ClientRepository(session)
 
     existing_user = await user_repo.get_by_email(payload.email)
-    client_created = False
 
     if existing_user:
         existing_user.telegram_user_id = telegram_user_id
         if payload.full_name:
             existing_user.full_name = payload.full_name
-        await session.commit()
-        await session.refresh(existing_user)
+        await session.flush()
+        user_cache.invalidate(existing_user.id)
         token = create_access_token(str(existing_user.id), extra_claims={"role": existing_user.role.value})
         return TelegramLinkExchangeResponse(access_token=token, client_created=False)
 
     client_name = payload.full_name or payload.email.split("@")[0]
-    client = await client_repo.create(name=client_name)
-    client_created = True
-
     user = User(
         email=payload.email,
         full_name=payload.full_name,
         role=UserRole.owner if desired_role != UserRole.admin else UserRole.admin,
         telegram_user_id=telegram_user_id,
-        client_id=client.id,
     )
-    await user_repo.create(user)
+    await service.create_with_client(client_name, user)
     token = create_access_token(str(user.id), extra_claims={"role": user.role.value})
-    return TelegramLinkExchangeResponse(access_token=token, client_created=client_created)
+    return TelegramLinkExchangeResponse(access_token=token, client_created=True)
 
 
 @router.post("/master/register", response_model=TelegramLinkExchangeResponse)
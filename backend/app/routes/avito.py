@@ -1,19 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from app.api import deps
-from app.models.enums import UserRole
+from app.core.responses import json_list
+from app.db.session import SessionLocal, release_connection
 from app.repositories.avito_repository import AvitoAccountRepository
 from app.repositories.dialog_repository import DialogRepository
-from app.repositories.message_repository import MessageRepository
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.bot_repository import BotRepository
 from app.schemas.avito import AvitoAccountCreateRequest, AvitoAccountResponse, AvitoAccountUpdateRequest
-from app.services.avito import AvitoService
+from app.services.avito import get_avito_service
 
 router = APIRouter()
 
+_ACCOUNT_LIST = TypeAdapter(list[AvitoAccountResponse])
+
+
+async def _register_webhook(account_id: int, failure_message: str) -> None:
+    async with SessionLocal() as session:
+        repo = AvitoAccountRepository(session)
+        account = await repo.get(account_id)
+        if account is None:
+            return
+        try:
+            await get_avito_service().ensure_webhook_for_account(account, repo)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception(failure_message, account_id=account_id, error=str(exc))
+
+
+async def _drop_webhook(account) -> None:
+    try:
+        await get_avito_service().drop_webhook(account)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(
+            "Failed to disable Avito webhook after account deletion",
+            account_id=account.id,
+            error=str(exc),
+        )
+
 
 @router.get("/accounts", response_model=list[AvitoAccountResponse])
 async def list_accounts(
@@ -25,24 +51,24 @@ async def list_accounts(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
     repo = AvitoAccountRepository(session)
     if project_id is not None:
-        project = await ProjectRepository(session).get(project_id)
-        if project is None or project.client_id != user.client_id:
+        if not await ProjectRepository(session).owns(project_id, user.client_id):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-        accounts = await repo.list_for_project(project_id)
+        accounts = await repo.list_for_project_raw(project_id)
     else:
-        accounts = await repo.list_for_client(user.client_id)
-    return accounts
+        accounts = await repo.list_for_client_raw(user.client_id)
+    return json_list(_ACCOUNT_LIST, accounts)
 
 
 @router.post("/accounts", response_model=AvitoAccountResponse, status_code=status.HTTP_201_CREATED)
 async def create_account(
     payload: AvitoAccountCreateRequest,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(deps.get_db),
     user=Depends(deps.get_current_user),
 ):
     if user.client_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
     if payload.project_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Укажите проект для интеграции Авито")
@@ -78,15 +104,8 @@ async def create_account(
         bot_id=bot.id,
         monitoring_enabled=payload.monitoring_enabled if payload.monitoring_enabled is not None else True,
     )
-    service = AvitoService()
-    try:
-        await service.ensure_webhook_for_account(account, repo)
-    except Exception as exc:  # noqa: BLE001
-        logger.exception(
-            "Failed to register Avito webhook after account creation",
-            account_id=account.id,
-            error=str(exc),
-        )
+    await release_connection(session)
+    background.add_task(_register_webhook, account.id, "Failed to register Avito webhook after account creation")
     return account
 
 
@@ -94,28 +113,28 @@ async def create_account(
 async def update_account(
     account_id: int,
     payload: AvitoAccountUpdateRequest,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(deps.get_db),
     user=Depends(deps.get_current_user),
 ):
     repo = AvitoAccountRepository(session)
-    account = await repo.get(account_id)
-    if account is None or account.client_id != user.client_id:
+    row = await repo.get_with_project_and_bot(account_id)
+    if row is None or row[0].client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
-    updates = payload.dict(exclude_unset=True)
+    account, project, bot = row
+    updates = {key: getattr(payload, key) for key in payload.__pydantic_fields_set__}
 
     project_repo = ProjectRepository(session)
     bot_repo = BotRepository(session)
 
     target_project_id = updates.get("project_id", account.project_id)
-    project = None
     if target_project_id is not None:
-        project = await project_repo.get(target_project_id)
+        if target_project_id != account.project_id:
+            project = await project_repo.get(target_project_id)
         if project is None or project.client_id != user.client_id:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    elif account.project_id:
-        project = await project_repo.get(account.project_id)
 
     target_bot_id = updates.get("bot_id")
     if target_bot_id is None:
@@ -127,7 +146,8 @@ async def update_account(
     if target_bot_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Проект не привязан к боту")
 
-    bot = await bot_repo.get(target_bot_id)
+    if bot is None or bot.id != target_bot_id:
+        bot = await bot_repo.get(target_bot_id)
     if bot is None or bot.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
 
@@ -141,21 +161,15 @@ async def update_account(
     updates["project_id"] = project.id if project is not None else None
 
     account = await repo.update(account, **updates)
-    service = AvitoService()
-    try:
-        await service.ensure_webhook_for_account(account, repo)
-    except Exception as exc:  # noqa: BLE001
-        logger.exception(
-            "Failed to register Avito webhook after account update",
-            account_id=account.id,
-            error=str(exc),
-        )
+    await release_connection(session)
+    background.add_task(_register_webhook, account.id, "Failed to register Avito webhook after account update")
     return account
 
 
 @router.delete("/accounts/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
     account_id: int,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(deps.get_db),
     user=Depends(deps.get_current_user),
 ):
@@ -163,29 +177,9 @@ async def delete_account(
     account = await repo.get(account_id)
     if account is None or account.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
-    dialog_repo = DialogRepository(session)
-    message_repo = MessageRepository(session)
-
-    dialogs = await dialog_repo.list_for_avito_account(account.id)
-    dialog_ids = [dialog.id for dialog in dialogs]
-
-    if dialog_ids:
-        await message_repo.delete_for_dialogs(dialog_ids)
-        for dialog in dialogs:
-            await dialog_repo.delete(dialog)
-
-    service = AvitoService()
-    try:
-        await service.disable_webhook_for_account(account, repo)
-    except Exception as exc:  # noqa: BLE001
-        logger.warning(
-            "Failed to disable Avito webhook before account deletion",
-            account_id=account.id,
-            error=str(exc),
-        )
 
-    await session.flush()
-    await session.delete(account)
-    await session.commit()
+    await DialogRepository(session).delete_for_avito_account(account.id)
+    await repo.delete(account)
+    background.add_task(_drop_webhook, account)
@@ -1,24 +1,26 @@
-from datetime import datetime
+import asyncio
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import delete
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.core.config import settings
-from app.models.enums import BotStatus, UserRole
-from app.models.telegram_chat import TelegramChat
+from app.core.responses import json_list
+from app.db.session import release_connection
+from app.models.enums import BotStatus
 from app.repositories.bot_repository import BotRepository
-from app.repositories.avito_repository import AvitoAccountRepository
-from app.repositories.dialog_repository import DialogRepository
-from app.repositories.message_repository import MessageRepository
 from app.repositories.telegram_chat_repository import TelegramChatRepository
 from app.schemas.bot import BotCreateRequest, BotResponse, BotUpdateRequest
 from app.schemas.telegram_chat import TelegramChatResponse
+from app.services.bot import BotService
 from app.services.telegram import TelegramService
+from app.utils import fresh_token
 
 router = APIRouter()
 
+_BOT_LIST = TypeAdapter(list[BotResponse])
+
 
 @router.get("/", response_model=list[BotResponse])
 async def list_bots(
@@ -27,8 +29,8 @@ async def list_bots(
 ):
     if user.client_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
-    bots = await BotRepository(session).list_for_client(user.client_id)
-    return bots
+    bots = await BotRepository(session).list_for_client_raw(user.client_id)
+    return json_list(_BOT_LIST, bots)
 
 
 @router.post("/", response_model=BotResponse, status_code=status.HTTP_201_CREATED)
@@ -39,22 +41,15 @@ async def create_bot(
 ):
     if user.client_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
     repo = BotRepository(session)
     existing = await repo.get_by_token(payload.token)
     if existing and existing.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Этот токен уже используется другим клиентом")
+    await release_connection(session)
 
-    bot = existing or await repo.create(
-        client_id=user.client_id,
-        token=payload.token,
-        bot_username=payload.bot_username,
-        group_chat_id=payload.group_chat_id,
-        topic_mode=payload.topic_mode,
-    )
-
-    service = TelegramService(bot.token)
+    service = TelegramService(payload.token)
     updates: dict[str, object] = {"topic_mode": payload.topic_mode}
     try:
         me = await service.get_me()
@@ -62,8 +57,6 @@ async def create_bot(
         if username:
             updates["bot_username"] = username
     except Exception as exc:  # noqa: BLE001
-        if not existing:
-            await repo.delete(bot)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный токен бота") from exc
 
     if payload.group_chat_id:
@@ -72,22 +65,29 @@ async def create_bot(
             updates["group_chat_id"] = str(chat.get("id", payload.group_chat_id))
             updates["status"] = BotStatus.active
         except Exception as exc:  # noqa: BLE001
-            if not existing:
-                await repo.delete(bot)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный ID группы") from exc
-    elif bot.group_chat_id:
+    elif existing and existing.group_chat_id:
         updates["status"] = BotStatus.active
     else:
         updates["status"] = BotStatus.inactive
 
+    if existing and not existing.webhook_secret:
+        updates["webhook_secret"] = fresh_token()
+
+    bot = existing or await repo.create(
+        client_id=user.client_id,
+        token=payload.token,
+        bot_username=payload.bot_username,
+        group_chat_id=payload.group_chat_id,
+        topic_mode=payload.topic_mode,
+    )
     bot = await repo.update(bot, **updates)
 
-    if not bot.webhook_secret:
-        bot = await repo.update(bot, webhook_secret=None)
     webhook_url = (
         f"{settings.webhook_base_url.rstrip('/')}/api/webhooks/telegram/{bot.id}/"
         f"{bot.webhook_secret}"
     )
+    await release_connection(session)
     try:
         await service.set_webhook(
             webhook_url,
@@ -135,13 +135,16 @@ async def list_bot_chats(
         targets = {chat.chat_id: chat for chat in chats}
         if bot.group_chat_id and bot.group_chat_id not in targets:
             targets[bot.group_chat_id] = None
-        for chat_id, chat in targets.items():
-            if chat is not None and chat.title:
-                continue
-            try:
-                info = await service.get_chat(chat_id)
-            except Exception:  # noqa: BLE001
+        pending = [(chat_id, chat) for chat_id, chat in targets.items() if chat is None or not chat.title]
+        infos = await asyncio.gather(
+            *(service.get_chat(chat_id) for chat_id, _ in pending),
+            return_exceptions=True,
+        )
+        refreshed = False
+        for (chat_id, chat), info in zip(pending, infos):
+            if isinstance(info, Exception):
                 continue
+            refreshed = True
             title = info.get("title") or info.get("username")
             username = info.get("username")
             is_forum = info.get("is_forum")
@@ -166,7 +169,8 @@ async def list_bot_chats(
                     chat_type=chat_type,
                 )
 
-        chats = await chat_repo.list_active_for_bot(bot_id)
+        if refreshed:
+            chats = await chat_repo.list_active_for_bot(bot_id)
 
     return chats
 
@@ -179,18 +183,22 @@ async def update_bot(
     user=Depends(deps.get_current_user),
 ):
     repo = BotRepository(session)
-    bot = await repo.get(bot_id)
-    if bot is None or bot.client_id != user.client_id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
+        bot = await repo.get(bot_id)
+        if bot is None or bot.client_id != user.client_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
-    bot = await repo.update(bot, **payload.dict(exclude_unset=True))
+    updates = {key: getattr(payload, key) for key in payload.__pydantic_fields_set__}
+    bot = await repo.update_if_owned(bot_id, user.client_id, **updates)
+    if bot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
     return bot
 
 
 @router.delete("/{bot_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_bot(
     bot_id: int,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(deps.get_db),
     user=Depends(deps.get_current_user),
 ):
@@ -198,32 +206,8 @@ async def delete_bot(
     bot = await repo.get(bot_id)
     if bot is None or bot.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
-    dialog_repo = DialogRepository(session)
-    message_repo = MessageRepository(session)
-    avito_repo = AvitoAccountRepository(session)
 
-    service = TelegramService(bot.token)
-    try:
-        await service.delete_webhook(drop_pending_updates=True)
-    except Exception:  # noqa: BLE001
-        pass
-
-    dialogs = await dialog_repo.list_for_bot(bot.id)
-    dialog_ids = [dialog.id for dialog in dialogs]
-
-    if dialog_ids:
-        await message_repo.delete_for_dialogs(dialog_ids)
-        for dialog in dialogs:
-            await dialog_repo.delete(dialog)
-
-    linked_accounts = await avito_repo.list_by_bot(bot.id)
-    for account in linked_accounts:
-        account.bot_id = None
-        account.updated_at = datetime.utcnow()
-
-    await session.flush()
-    await session.execute(delete(TelegramChat).where(TelegramChat.bot_id == bot.id))
-    await session.delete(bot)
-    await session.commit()
+    await BotService(session).delete_bot(bot)
+    background.add_task(BotService.drop_webhook, bot.id, bot.token)
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 from typing import Any, Dict
-from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from zoneinfo import ZoneInfoNotFoundError
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.core.responses import json_list
 from app.repositories.client_repository import ClientRepository
 from app.repositories.dialog_repository import DialogRepository
 from app.schemas.client import ClientCreateRequest, ClientResponse, ClientUpdateRequest
+from app.utils.timezones import get_zone
 
 router = APIRouter()
 
+_CLIENT_LIST = TypeAdapter(list[ClientResponse])
+
 
 @router.get("/me", response_model=ClientResponse)
 async def get_my_client(
@@ -53,8 +58,8 @@ async def list_clients(
     session: AsyncSession = Depends(deps.get_db),
     _: object = Depends(deps.get_current_admin),
 ):
-    clients = await ClientRepository(session).list()
-    return clients
+    clients = await ClientRepository(session).list_raw()
+    return json_list(_CLIENT_LIST, clients)
 
 
 @router.post("/", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
@@ -65,34 +70,15 @@ async def create_client(
 ):
     repo = ClientRepository(session)
 
-    auto_reply_text = payload.auto_reply_text.strip() if payload.auto_reply_text else None
-    auto_reply_timezone = payload.auto_reply_timezone.strip() if payload.auto_reply_timezone else None
-    auto_reply_enabled = bool(payload.auto_reply_enabled)
-    auto_reply_always = bool(payload.auto_reply_always)
-    auto_reply_start_time = payload.auto_reply_start_time
-    auto_reply_end_time = payload.auto_reply_end_time
-    if auto_reply_timezone:
-        try:
-            ZoneInfo(auto_reply_timezone)
-        except ZoneInfoNotFoundError as exc:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Указан неверный часовой пояс") from exc
-
-    if auto_reply_enabled:
-        if not auto_reply_timezone:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Укажите часовой пояс для автоответа")
-        if not auto_reply_text:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Введите текст автоответа")
-        if not auto_reply_always:
-            if auto_reply_start_time is None or auto_reply_end_time is None:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Укажите время начала и окончания автоответа",
-                )
-            if auto_reply_start_time == auto_reply_end_time:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Время начала и окончания не могут совпадать",
-                )
+    auto_reply = {
+        "auto_reply_enabled": bool(payload.auto_reply_enabled),
+        "auto_reply_always": bool(payload.auto_reply_always),
+        "auto_reply_start_time": payload.auto_reply_start_time,
+        "auto_reply_end_time": payload.auto_reply_end_time,
+        "auto_reply_timezone": payload.auto_reply_timezone.strip() if payload.auto_reply_timezone else None,
+        "auto_reply_text": payload.auto_reply_text.strip() if payload.auto_reply_text else None,
+    }
+    _validate_auto_reply(auto_reply)
 
     client = await repo.create(
         name=payload.name,
@@ -100,12 +86,7 @@ async def create_client(
         filter_keywords=payload.filter_keywords,
         require_reply_for_avito=payload.require_reply_for_avito or False,
         hide_system_messages=payload.hide_system_messages if payload.hide_system_messages is not None else True,
-        auto_reply_enabled=auto_reply_enabled,
-        auto_reply_always=auto_reply_always,
-        auto_reply_start_time=auto_reply_start_time,
-        auto_reply_end_time=auto_reply_end_time,
-        auto_reply_timezone=auto_reply_timezone,
-        auto_reply_text=auto_reply_text,
+        **auto_reply,
     )
     return client
 
@@ -131,7 +112,7 @@ async def update_client(
 
 
 def _prepare_client_update_payload(client, payload: ClientUpdateRequest) -> Dict[str, Any]:
-    updates = payload.model_dump(exclude_unset=True)
+    updates = {key: getattr(payload, key) for key in payload.__pydantic_fields_set__}
 
     if "auto_reply_text" in updates:
         text_value = updates["auto_reply_text"]
@@ -146,38 +127,45 @@ def _prepare_client_update_payload(client, payload: ClientUpdateRequest) -> Dict
         if tz_value is not None:
             updates["auto_reply_timezone"] = tz_value.strip() or None
 
-    enabled = updates.get("auto_reply_enabled", client.auto_reply_enabled)
-    always = updates.get("auto_reply_always", client.auto_reply_always)
-    start_time = updates.get("auto_reply_start_time", client.auto_reply_start_time)
-    end_time = updates.get("auto_reply_end_time", client.auto_reply_end_time)
-    timezone = updates.get("auto_reply_timezone", client.auto_reply_timezone)
-    text_for_validation: str = ""
-    if "auto_reply_text" in updates:
-        text_for_validation = updates["auto_reply_text"] or ""
-    else:
-        text_for_validation = (client.auto_reply_text or "").strip()
+    client_defaults = {
+        "auto_reply_enabled": client.auto_reply_enabled,
+        "auto_reply_always": client.auto_reply_always,
+        "auto_reply_start_time": client.auto_reply_start_time,
+        "auto_reply_end_time": client.auto_reply_end_time,
+        "auto_reply_timezone": client.auto_reply_timezone,
+        "auto_reply_text": (client.auto_reply_text or "").strip(),
+    }
+    _validate_auto_reply({**client_defaults, **updates})
 
+    return updates
+
+
+def _validate_auto_reply(values: Dict[str, Any]) -> None:
+    enabled = values["auto_reply_enabled"]
+    timezone = values["auto_reply_timezone"]
     if timezone:
         try:
-            ZoneInfo(timezone)
+            get_zone(timezone)
         except ZoneInfoNotFoundError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Указан неверный часовой пояс") from exc
     elif enabled:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Укажите часовой пояс для автоответа")
 
-    if enabled:
-        if not text_for_validation:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Введите текст автоответа")
-        if not always:
-            if start_time is None or end_time is None:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Укажите время начала и окончания автоответа",
-                )
-            if start_time == end_time:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Время начала и окончания не могут совпадать",
-                )
-
-    return updates
+    if not enabled:
+        return
+    if not values["auto_reply_text"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Введите текст автоответа")
+    if values["auto_reply_always"]:
+        return
+    start_time = values["auto_reply_start_time"]
+    end_time = values["auto_reply_end_time"]
+    if start_time is None or end_time is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Укажите время начала и окончания автоответа",
+        )
+    if start_time == end_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Время начала и окончания не могут совпадать",
+        )
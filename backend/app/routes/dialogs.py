@@ -1,9 +1,10 @@
-import json
-
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.core.responses import json_list
 from app.models.enums import DialogSource
 from app.repositories.dialog_repository import DialogRepository
 from app.repositories.message_repository import MessageRepository
@@ -17,6 +18,8 @@ from app.services.dialog import DialogService
 
 router = APIRouter()
 
+_DIALOG_LIST = TypeAdapter(list[DialogResponse])
+
 
 @router.get("/", response_model=list[DialogResponse])
 async def list_dialogs(
@@ -25,8 +28,8 @@ async def list_dialogs(
 ):
     if user.client_id is None:
         raise HTTPException(status_code=400, detail="User not attached to client")
-    dialogs = await DialogRepository(session).list_for_client(user.client_id)
-    return dialogs
+    dialogs = await DialogRepository(session).list_for_client_raw(user.client_id)
+    return json_list(_DIALOG_LIST, dialogs)
 
 
 @router.get("/{dialog_id}", response_model=DialogMessagesResponse)
@@ -39,29 +42,17 @@ async def get_dialog(
     dialog = await repo.get(dialog_id)
     if dialog is None or dialog.client_id != user.client_id:
         raise HTTPException(status_code=404, detail="Dialog not found")
-    messages = await MessageRepository(session).list_for_dialog(dialog_id)
-    return DialogMessagesResponse(
-        dialog=dialog,
-        messages=[
-            {
-                "id": m.id,
-                "direction": m.direction,
-                "body": m.body,
-                "status": m.status,
-                "created_at": m.created_at,
-                "attachments": _safe_load_attachments(m.attachments),
-            }
-            for m in messages
-        ],
-    )
+    rows = await MessageRepository(session).list_for_dialog_raw(dialog_id)
+    messages = [{**row, "attachments": _safe_load_attachments(row["attachments"])} for row in rows]
+    return DialogMessagesResponse(dialog=dialog, messages=messages)
 
 
 def _safe_load_attachments(raw: str | None) -> list | dict | None:
     if not raw:
         return None
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
         return None
 
 
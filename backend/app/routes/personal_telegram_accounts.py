@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from typing import AsyncIterator
+
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.models.enums import UserRole
+from app.core.responses import json_bytes, json_list
 from app.schemas.personal_telegram_account import (
     PersonalTelegramAccountLoginRequest,
     PersonalTelegramAccountLoginResponse,
@@ -17,24 +22,60 @@ from app.services.personal_telegram_account import PersonalTelegramAccountServic
 
 router = APIRouter()
 
+_RESPONSE_FIELDS = tuple(PersonalTelegramAccountResponse.model_fields)
+_ACCOUNT_LIST = TypeAdapter(list[PersonalTelegramAccountResponse])
+
+
+def _to_response(account) -> PersonalTelegramAccountResponse:
+    return PersonalTelegramAccountResponse.model_construct(**{name: getattr(account, name) for name in _RESPONSE_FIELDS})
+
+
+async def _ndjson(accounts) -> AsyncIterator[bytes]:
+    async for account in accounts:
+        yield orjson.dumps({name: getattr(account, name) for name in _RESPONSE_FIELDS}) + b"\n"
+
+
+def get_service(session: AsyncSession = Depends(deps.get_db)) -> PersonalTelegramAccountService:
+    return PersonalTelegramAccountService(session)
 
-def _ensure_owner(user) -> None:
-    if user.role not in (UserRole.owner, UserRole.admin):
+
+def get_client_user(user=Depends(deps.get_current_user)):
+    if user.client_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
+    return user
+
+
+def require_owner(user=Depends(get_client_user)):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав")
+    return user
 
 
 @router.get("", response_model=list[PersonalTelegramAccountResponse])
 @router.get("/", response_model=list[PersonalTelegramAccountResponse], include_in_schema=False)
 async def list_personal_accounts(
     project_id: int | None = None,
-    session: AsyncSession = Depends(deps.get_db),
-    user=Depends(deps.get_current_user),
+    stream: bool = False,
+    if_none_match: str | None = Header(None),
+    service: PersonalTelegramAccountService = Depends(get_service),
+    user=Depends(get_client_user),
 ):
-    if user.client_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
-    service = PersonalTelegramAccountService(session)
-    accounts = await service.list_accounts(client_id=user.client_id, project_id=project_id)
-    return [PersonalTelegramAccountResponse.model_validate(account) for account in accounts]
+    if stream:
+        accounts = await service.stream_accounts(client_id=user.client_id, project_id=project_id)
+        return StreamingResponse(_ndjson(accounts), media_type="application/x-ndjson")
+    fingerprint = await service.list_accounts_fingerprint(client_id=user.client_id, project_id=project_id)
+    if if_none_match == fingerprint:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": fingerprint})
+    cache_key = {"client_id": user.client_id, "project_id": project_id, "fingerprint": fingerprint}
+    cached = await service.get_cached_list(**cache_key)
+    if cached is not None:
+        response = json_bytes(cached)
+    else:
+        accounts = await service.list_accounts(client_id=user.client_id, project_id=project_id)
+        response = json_list(_ACCOUNT_LIST, accounts)
+        await service.cache_list(**cache_key, payload=response.body)
+    response.headers["ETag"] = fingerprint
+    return response
 
 
 @router.post(
@@ -44,102 +85,78 @@ async def list_personal_accounts(
 )
 async def start_personal_account_login(
     payload: PersonalTelegramAccountLoginRequest,
-    session: AsyncSession = Depends(deps.get_db),
-    user=Depends(deps.get_current_user),
+    service: PersonalTelegramAccountService = Depends(get_service),
+    user=Depends(require_owner),
 ):
-    if user.client_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
-    _ensure_owner(user)
-    service = PersonalTelegramAccountService(session)
     login_session = await service.start_login(project_id=payload.project_id, client_id=user.client_id)
-    return PersonalTelegramAccountLoginResponse(
+    response = PersonalTelegramAccountLoginResponse.model_construct(
         login_id=login_session.login_id,
         qr_url=login_session.qr_url,
         expires_at=login_session.expires_at,
     )
+    return json_bytes(response.model_dump_json(), status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/login/{login_id}", response_model=PersonalTelegramAccountLoginStatusResponse)
 async def get_personal_account_login_status(
     login_id: str = Path(..., min_length=16, description="Идентификатор login-сессии"),
-    session: AsyncSession = Depends(deps.get_db),
-    user=Depends(deps.get_current_user),
+    service: PersonalTelegramAccountService = Depends(get_service),
+    user=Depends(get_client_user),
 ):
-    if user.client_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
-    service = PersonalTelegramAccountService(session)
-    login_session = await service.get_login_session(login_id=login_id, client_id=user.client_id)
-
-    account_payload = None
-    if login_session.status == "completed" and login_session.account_id:
-        account = await service.account_repo.get(login_session.account_id)
-        if account:
-            account_payload = PersonalTelegramAccountResponse.model_validate(account)
-    return PersonalTelegramAccountLoginStatusResponse(
+    login_session, account = await service.get_login_session_with_account(login_id=login_id, client_id=user.client_id)
+    account_payload = _to_response(account) if account else None
+    response = PersonalTelegramAccountLoginStatusResponse.model_construct(
         status=login_session.status,
         account=account_payload,
         error=login_session.error,
     )
+    return json_bytes(response.model_dump_json())
 
 
 @router.post("/login/{login_id}/password", response_model=PersonalTelegramAccountLoginStatusResponse)
 async def submit_personal_account_password(
     payload: PersonalTelegramAccountPasswordRequest,
     login_id: str = Path(..., min_length=16, description="Идентификатор login-сессии"),
-    session: AsyncSession = Depends(deps.get_db),
-    user=Depends(deps.get_current_user),
+    service: PersonalTelegramAccountService = Depends(get_service),
+    user=Depends(require_owner),
 ):
-    if user.client_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
-    _ensure_owner(user)
-    service = PersonalTelegramAccountService(session)
-    login_session = await service.submit_password(login_id=login_id, client_id=user.client_id, password=payload.password)
-
-    account_payload = None
-    if login_session.status == "completed" and login_session.account_id:
-        account = await service.account_repo.get(login_session.account_id)
-        if account:
-            account_payload = PersonalTelegramAccountResponse.model_validate(account)
-
-    return PersonalTelegramAccountLoginStatusResponse(
+    login_session, account = await service.submit_password(
+        login_id=login_id,
+        client_id=user.client_id,
+        password=payload.password,
+    )
+    account_payload = _to_response(account) if account else None
+    response = PersonalTelegramAccountLoginStatusResponse.model_construct(
         status=login_session.status,
         account=account_payload,
         error=login_session.error,
     )
+    return json_bytes(response.model_dump_json())
 
 
 @router.patch("/{account_id}", response_model=PersonalTelegramAccountResponse)
 async def update_personal_account(
     account_id: int,
     payload: PersonalTelegramAccountUpdateRequest,
-    session: AsyncSession = Depends(deps.get_db),
-    user=Depends(deps.get_current_user),
+    service: PersonalTelegramAccountService = Depends(get_service),
+    user=Depends(require_owner),
 ):
-    if user.client_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
-    _ensure_owner(user)
-    service = PersonalTelegramAccountService(session)
-    account = await service.get_account(account_id=account_id, client_id=user.client_id)
     updated = await service.update_account(
-        account=account,
+        account_id=account_id,
+        client_id=user.client_id,
         display_name=payload.display_name,
         accepts_private=payload.accepts_private,
         accepts_groups=payload.accepts_groups,
         accepts_channels=payload.accepts_channels,
     )
-    return PersonalTelegramAccountResponse.model_validate(updated)
+    return json_bytes(_to_response(updated).model_dump_json())
 
 
 @router.delete("/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_personal_account(
     account_id: int,
-    session: AsyncSession = Depends(deps.get_db),
-    user=Depends(deps.get_current_user),
+    service: PersonalTelegramAccountService = Depends(get_service),
+    user=Depends(require_owner),
 ):
-    if user.client_id is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь не привязан к клиенту")
-    _ensure_owner(user)
-    service = PersonalTelegramAccountService(session)
-    account = await service.get_account(account_id=account_id, client_id=user.client_id)
-    await service.delete_account(account=account)
+    await service.delete_account(account_id=account_id, client_id=user.client_id)
     return None
@@ -2,18 +2,15 @@ from __future__ import annotations
 
 import logging
 import re
-from datetime import datetime
 from typing import Any
-from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from zoneinfo import ZoneInfoNotFoundError
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import delete
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.core.config import settings
-from app.models.enums import AutoReplyMode, BotStatus, UserRole
-from app.models.telegram_chat import TelegramChat
+from app.models.enums import AutoReplyMode, BotStatus
 from app.repositories.bot_repository import BotRepository
 from app.repositories.avito_repository import AvitoAccountRepository
 from app.repositories.dialog_repository import DialogRepository
@@ -24,8 +21,10 @@ from app.schemas.project import (
     ProjectResponse,
     ProjectUpdateRequest,
 )
+from app.services.bot import BotService
 from app.services.telegram import TelegramService
 from app.services.telegram_source import TelegramSourceService
+from app.utils.timezones import get_zone
 
 router = APIRouter()
 
@@ -104,7 +103,7 @@ def _prepare_auto_reply_payload(*, payload: dict[str, Any], existing: Any | None
 
     if timezone:
         try:
-            ZoneInfo(timezone)
+            get_zone(timezone)
         except ZoneInfoNotFoundError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Указан неверный часовой пояс") from exc
     elif enabled:
@@ -243,34 +242,6 @@ async def _ensure_bot_as_source(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Не удалось настроить вебхук Telegram источника") from exc
 
 
-async def _cleanup_and_delete_bot(session: AsyncSession, bot) -> None:
-    dialog_repo = DialogRepository(session)
-    message_repo = MessageRepository(session)
-    avito_repo = AvitoAccountRepository(session)
-
-    tg_service = TelegramService(bot.token)
-    try:
-        await tg_service.delete_webhook(drop_pending_updates=True)
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("Failed to delete Telegram webhook for bot %s: %s", bot.id, exc)
-
-    dialogs = await dialog_repo.list_for_bot(bot.id)
-    dialog_ids = [dialog.id for dialog in dialogs]
-    if dialog_ids:
-        await message_repo.delete_for_dialogs(dialog_ids)
-        for dialog in dialogs:
-            await dialog_repo.delete(dialog)
-
-    accounts = await avito_repo.list_by_bot(bot.id)
-    for account in accounts:
-        account.bot_id = None
-        account.updated_at = datetime.utcnow()
-
-    await session.flush()
-    await session.execute(delete(TelegramChat).where(TelegramChat.bot_id == bot.id))
-    await session.delete(bot)
-
-
 @router.get("/", response_model=list[ProjectResponse])
 async def list_projects(
     session: AsyncSession = Depends(deps.get_db),
@@ -278,7 +249,7 @@ async def list_projects(
 ):
     if user.client_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
     projects = await ProjectRepository(session).list_for_client(user.client_id)
     return projects
@@ -302,7 +273,7 @@ async def get_project(
     project = await repo.get(project_id)
     if project is None or project.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
     return project
 
@@ -439,10 +410,10 @@ async def update_project(
     project = await repo.get(project_id)
     if project is None or project.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
 
-    updates = payload.model_dump(exclude_unset=True)
+    updates = {key: getattr(payload, key) for key in payload.__pydantic_fields_set__}
     previous_auto_reply_enabled = project.auto_reply_enabled
 
     bot_repo = BotRepository(session)
@@ -568,6 +539,7 @@ async def update_project(
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: int,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(deps.get_db),
     user=Depends(deps.get_current_user),
 ):
@@ -576,7 +548,7 @@ async def delete_project(
     if project is None or project.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
 
     avito_repo = AvitoAccountRepository(session)
@@ -598,6 +570,6 @@ async def delete_project(
         bot_repo = BotRepository(session)
         bot = await bot_repo.get(bot_id)
         if bot is not None:
-            await _cleanup_and_delete_bot(session, bot)
-            await session.commit()
+            await BotService(session).delete_bot(bot)
+            background.add_task(BotService.drop_webhook, bot.id, bot.token)
     return None
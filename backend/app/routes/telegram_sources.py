@@ -1,15 +1,14 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from app.api import deps
 from app.core.config import settings
-from app.models.enums import TelegramSourceStatus, UserRole
+from app.models.enums import TelegramSourceStatus
 from app.repositories.bot_repository import BotRepository
 from app.repositories.dialog_repository import DialogRepository
-from app.repositories.message_repository import MessageRepository
 from app.repositories.telegram_source_repository import TelegramSourceRepository
 from app.repositories.project_repository import ProjectRepository
 from app.schemas.telegram_source import (
@@ -40,8 +39,7 @@ async def list_telegram_sources(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
     service = TelegramSourceService(session)
     if project_id is not None:
-        project = await ProjectRepository(session).get(project_id)
-        if project is None or project.client_id != user.client_id:
+        if not await ProjectRepository(session).owns(project_id, user.client_id):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Проект не найден")
         sources = await service.source_repo.list_for_project(project_id)
     else:
@@ -58,7 +56,7 @@ async def create_telegram_source(
 ):
     if user.client_id is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not attached to client")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
 
     project_repo = ProjectRepository(session)
@@ -141,7 +139,7 @@ async def update_telegram_source(
     source = await repo.get(source_id)
     if source is None or source.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Источник не найден")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
 
     updates: dict[str, Any] = {}
@@ -193,6 +191,7 @@ async def update_telegram_source(
 @router.delete("/{source_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_telegram_source(
     source_id: int,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(deps.get_db),
     user=Depends(deps.get_current_user),
 ):
@@ -200,24 +199,9 @@ async def delete_telegram_source(
     source = await repo.get(source_id)
     if source is None or source.client_id != user.client_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Источник не найден")
-    if user.role not in (UserRole.owner, UserRole.admin):
+    if not user.is_privileged:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permission denied")
 
-    service = TelegramSourceService(session)
-    try:
-        await service.delete_webhook(source, drop_pending_updates=True)
-    except Exception:  # noqa: BLE001
-        pass
-
-    dialog_repo = DialogRepository(session)
-    message_repo = MessageRepository(session)
-
-    dialogs = await dialog_repo.list_for_telegram_source(source.id)
-    dialog_ids = [dialog.id for dialog in dialogs]
-
-    if dialog_ids:
-        await message_repo.delete_for_dialogs(dialog_ids)
-        for dialog in dialogs:
-            await dialog_repo.delete(dialog)
-
+    await DialogRepository(session).delete_for_telegram_source(source.id)
     await repo.delete(source)
+    background.add_task(TelegramSourceService(session).delete_webhook, source, drop_pending_updates=True)
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from app.api import deps
+from app.core.keyed_lock import KeyedLock
 from app.repositories.avito_repository import AvitoAccountRepository
 from app.repositories.bot_repository import BotRepository
 from app.repositories.telegram_chat_repository import TelegramChatRepository
@@ -16,6 +17,8 @@ from app.services.telegram_source import TelegramSourceService
 
 router = APIRouter()
 
+_chat_locks = KeyedLock()
+
 
 @router.post("/avito/messages/{account_id}/{secret}")
 async def avito_message_webhook(
@@ -76,11 +79,14 @@ async def telegram_webhook(
 
     membership_update = payload.get("my_chat_member")
     if membership_update:
-        result = await _handle_my_chat_member_update(
-            session=session,
-            bot=bot,
-            update=membership_update,
-        )
+        member_chat_id = (membership_update.get("chat") or {}).get("id")
+        async with _chat_locks.hold((bot.id, str(member_chat_id))):
+            result = await _handle_my_chat_member_update(
+                session=session,
+                bot=bot,
+                update=membership_update,
+            )
+            await session.commit()
         return {"status": "ok", "data": result}
 
     message = payload.get("message") or payload.get("channel_post")
@@ -182,14 +188,16 @@ async def telegram_webhook(
 
     service = DialogService(session)
     try:
-        result = await service.handle_telegram_message(
-            bot_token=bot_token,
-            chat_id=chat_id,
-            telegram_message=message,
-            message_id=message_id,
-            message_thread_id=thread_id,
-            reply_to_message_id=reply_to_message_id,
-        )
+        async with _chat_locks.hold((bot.id, chat_id)):
+            result = await service.handle_telegram_message(
+                bot_token=bot_token,
+                chat_id=chat_id,
+                telegram_message=message,
+                message_id=message_id,
+                message_thread_id=thread_id,
+                reply_to_message_id=reply_to_message_id,
+            )
+            await session.commit()
     except ValueError as exc:
         context = {
             "bot_id": bot_id,
@@ -263,7 +271,7 @@ async def telegram_source_webhook(
     session: AsyncSession = Depends(deps.get_db),
 ):
     repo = TelegramSourceRepository(session)
-    source = await repo.get(source_id)
+    source = await repo.get(source_id, load=("bot",))
     if source is None or source.webhook_secret != secret:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook not registered")
 
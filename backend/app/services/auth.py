@@ -4,13 +4,21 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import HTTPException, status
-from jose import JWTError
+from jwt import InvalidTokenError as JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.db.session import flush_or_commit
+from app.core import user_cache
+from app.core.security import (
+    create_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
+)
+from app.models.client import Client
 from app.models.enums import UserRole
 from app.models.user import User
-from app.repositories.client_repository import ClientRepository
 from app.repositories.user_repository import UserRepository
 from app.repositories.project_settings_repository import ProjectSettingsRepository
 from app.schemas.auth import TelegramAuthRequest
@@ -25,30 +33,23 @@ class AuthService:
     async def authenticate(self, email: str, password: str) -> str:
         self._ensure_password_length(password)
         user = await self.user_repo.get_by_email(email)
-        client_repo = ClientRepository(self.session)
 
         if user is None:
-            client = await client_repo.create(name=self._derive_client_name(email))
-            new_user = User(
-                email=email,
-                role=UserRole.owner,
-                client_id=client.id,
-            )
-            user = await self.user_repo.create(new_user, password=password)
+            new_user = User(email=email, role=UserRole.owner)
+            user = await self.create_with_client(self._derive_client_name(email), new_user, password=password)
         else:
             if not user.is_active:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
 
             if user.hashed_password is None:
-                user.hashed_password = get_password_hash(password)
+                user.hashed_password = await get_password_hash_async(password)
                 if user.client_id is None:
-                    client = await client_repo.create(name=self._derive_client_name(email))
-                    user.client_id = client.id
-                await self.session.commit()
-                await self.session.refresh(user)
+                    user.client = Client(name=self._derive_client_name(email))
+                await flush_or_commit(self.session)
+                user_cache.invalidate(user.id)
 
             try:
-                if not verify_password(password, user.hashed_password):
+                if not await verify_password_async(password, user.hashed_password):
                     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
             except ValueError as exc:
                 if "password cannot be longer than 72 bytes" in str(exc):
@@ -58,6 +59,10 @@ class AuthService:
                     ) from exc
                 raise
 
+            if password_needs_rehash(user.hashed_password):
+                user.hashed_password = await get_password_hash_async(password)
+                await flush_or_commit(self.session)
+
         return create_access_token(str(user.id), extra_claims={"role": user.role.value})
 
     @staticmethod
@@ -71,11 +76,10 @@ class AuthService:
         existing = await self.user_repo.get_by_email(email)
         if existing:
             if password:
-                existing.hashed_password = get_password_hash(password)
+                existing.hashed_password = await get_password_hash_async(password)
             if full_name and not existing.full_name:
                 existing.full_name = full_name
-            await self.session.commit()
-            await self.session.refresh(existing)
+            await flush_or_commit(self.session)
             return existing
         return await self.user_repo.create_admin(email=email, password=password, full_name=full_name)
 
@@ -104,37 +108,33 @@ class AuthService:
 
         telegram_user_id = str(payload.id)
         user = await self.user_repo.get_by_telegram_user_id(telegram_user_id)
-        client_repo = ClientRepository(self.session)
 
         if not user:
             full_name_parts = [part for part in [payload.first_name, payload.last_name] if part]
             derived_full_name = " ".join(full_name_parts) if full_name_parts else None
             default_client_name = derived_full_name or payload.username or f"Telegram {telegram_user_id}"
 
-            client = await client_repo.create(name=default_client_name)
-
             generated_password = f"{telegram_user_id}tuberry1"
-            user = await self.user_repo.create(
+            user = await self.create_with_client(
+                default_client_name,
                 User(
                     email=telegram_user_id,
                     full_name=derived_full_name,
                     role=UserRole.owner,
                     telegram_user_id=telegram_user_id,
-                    client_id=client.id,
                 ),
                 password=generated_password,
             )
         else:
             updated = False
             if not user.hashed_password:
-                user.hashed_password = get_password_hash(f"{telegram_user_id}tuberry1")
+                user.hashed_password = await get_password_hash_async(f"{telegram_user_id}tuberry1")
                 updated = True
             if not user.email:
                 user.email = telegram_user_id
                 updated = True
             if not user.client_id:
-                client = await client_repo.create(name=self._derive_client_name(telegram_user_id))
-                user.client_id = client.id
+                user.client = Client(name=self._derive_client_name(telegram_user_id))
                 updated = True
             full_name_parts = [part for part in [payload.first_name, payload.last_name] if part]
             derived_full_name = " ".join(full_name_parts)
@@ -142,8 +142,8 @@ class AuthService:
                 user.full_name = derived_full_name
                 updated = True
             if updated:
-                await self.session.commit()
-                await self.session.refresh(user)
+                await flush_or_commit(self.session)
+                user_cache.invalidate(user.id)
 
         if not user.is_active:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь деактивирован")
@@ -167,19 +167,19 @@ class AuthService:
         full_name = " ".join(full_name_parts) if full_name_parts else None
         default_client_name = full_name or payload.username or f"Telegram {telegram_user_id}"
 
-        client_repo = ClientRepository(self.session)
-        client = await client_repo.create(name=default_client_name)
-
         user = User(
             email=(payload.username and f"{payload.username}@telegram.local") or None,
             full_name=full_name,
             role=UserRole.owner,
             telegram_user_id=telegram_user_id,
-            client_id=client.id,
         )
-        created_user = await self.user_repo.create(user)
+        created_user = await self.create_with_client(default_client_name, user)
         return created_user, True
 
+    async def create_with_client(self, client_name: str, user: User, password: str | None = None) -> User:
+        user.client = Client(name=client_name)
+        return await self.user_repo.create(user, password=password)
+
     def _verify_telegram_payload(self, payload: TelegramAuthRequest, master_bot_token: str) -> None:
         secret_key = hashlib.sha256(master_bot_token.encode()).digest()
         data = payload.model_dump(exclude_none=True, exclude={"hash"})
@@ -2,13 +2,14 @@ from __future__ import annotations
 
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Dict, Sequence
 from urllib.parse import quote
 
-import httpx
 from loguru import logger
 
 from app.core.config import settings
+from app.core.http import shared_client
 from app.db.session import SessionLocal
 from app.models.avito import AvitoAccount
 from app.repositories.avito_repository import AvitoAccountRepository
@@ -63,7 +64,7 @@ class AvitoService:
             access_token = await self._ensure_access_token(account, repo)
             user_id = await self._get_account_user_id(account.id, access_token)
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.post(
                 f"/messenger/v1/accounts/{user_id}/chats/{quote(str(dialog_id), safe='')}/messages",
                 json={"type": "text", "message": {"text": text}},
@@ -101,7 +102,7 @@ class AvitoService:
             access_token = await self._ensure_access_token(account, repo)
             user_id = await self._get_account_user_id(account.id, access_token)
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.post(
                 f"/messenger/v1/accounts/{user_id}/chats/{quote(str(dialog_id), safe='')}/messages/image",
                 json={"image_id": image_id},
@@ -145,7 +146,7 @@ class AvitoService:
             )
         }
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=30.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=30.0) as client:
             response = await client.post(
                 f"/messenger/v1/accounts/{user_id}/uploadImages",
                 headers={"Authorization": f"Bearer {access_token}"},
@@ -172,7 +173,7 @@ class AvitoService:
             access_token = await self._ensure_access_token(account, repo)
             user_id = await self._get_account_user_id(account.id, access_token)
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.post(
                 f"/messenger/v1/accounts/{user_id}/chats/{quote(str(dialog_id), safe='')}/read",
                 headers=self._build_headers(access_token),
@@ -190,7 +191,7 @@ class AvitoService:
             access_token = await self._ensure_access_token(account, repo)
             user_id = await self._get_account_user_id(account.id, access_token)
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.get(
                 f"/messenger/v2/accounts/{user_id}/chats/{quote(str(dialog_id), safe='')}",
                 headers=self._build_headers(access_token),
@@ -225,7 +226,7 @@ class AvitoService:
             params.append(("page", str(page)))
             params.append(("limit", str(page_limit)))
 
-            async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+            async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
                 response = await client.get(
                     "/order-management/1/orders",
                     params=params,
@@ -256,7 +257,7 @@ class AvitoService:
 
         params: list[tuple[str, str]] = [("voice_ids", str(voice_id)) for voice_id in voice_ids]
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.get(
                 f"/messenger/v1/accounts/{user_id}/getVoiceFiles",
                 params=params,
@@ -295,7 +296,7 @@ class AvitoService:
         ]
         last_error: str | None = None
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             for endpoint in endpoints:
                 response = await client.post(
                     endpoint,
@@ -342,26 +343,14 @@ class AvitoService:
         await repo.set_webhook_status(account, enabled=True, url=target_url, last_error=None)
         return {"url": target_url, "response": response_json}
 
-    async def disable_webhook_for_account(
-        self,
-        account: AvitoAccount,
-        repo: AvitoAccountRepository,
-    ) -> None:
+    async def drop_webhook(self, account: AvitoAccount) -> None:
+        access_token = self._valid_access_token(account)
+        if access_token is None:
+            access_token, _ = await self._request_access_token(account)
         target_url = account.webhook_url or (
             self.compose_webhook_url(account.id, account.webhook_secret) if account.webhook_secret else None
         )
 
-        try:
-            access_token = await self._ensure_access_token(account, repo)
-        except Exception as exc:  # noqa: BLE001
-            logger.warning(
-                "Failed to obtain Avito access token before webhook removal",
-                account_id=account.id,
-                error=str(exc),
-            )
-            await repo.set_webhook_status(account, enabled=False, url=None, last_error=str(exc))
-            return
-
         endpoints = [
             "/messenger/v3/webhook",
             "/messenger/v1/webhook",
@@ -371,7 +360,7 @@ class AvitoService:
         last_error: str | None = None
         success = False
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             for endpoint in endpoints:
                 try:
                     response = await client.delete(
@@ -411,7 +400,8 @@ class AvitoService:
                     error=last_error,
                 )
 
-        await repo.set_webhook_status(account, enabled=False, url=None, last_error=None if success else last_error)
+        if not success:
+            raise RuntimeError(f"Failed to remove Avito webhook: {last_error or 'unknown error'}")
 
     @asynccontextmanager
     async def _account_context(
@@ -427,18 +417,39 @@ class AvitoService:
     async def _ensure_access_token(
         self, account: AvitoAccount, repo: AvitoAccountRepository
     ) -> str:
+        access_token = self._valid_access_token(account)
+        if access_token is not None:
+            return access_token
+        refreshed = await self._refresh_access_token(account, repo)
+        return refreshed
+
+    @staticmethod
+    def _valid_access_token(account: AvitoAccount) -> str | None:
         if (
             account.access_token
             and account.token_expires_at
             and account.token_expires_at > datetime.utcnow() + timedelta(seconds=TOKEN_LEEWAY_SECONDS)
         ):
             return account.access_token
-        refreshed = await self._refresh_access_token(account, repo)
-        return refreshed
+        return None
 
     async def _refresh_access_token(
         self, account: AvitoAccount, repo: AvitoAccountRepository
     ) -> str:
+        access_token, expires_at = await self._request_access_token(account)
+
+        updated_account = await repo.update(
+            account,
+            access_token=access_token,
+            token_expires_at=expires_at,
+        )
+
+        # Сбросим кеш user_id, чтобы в следующем вызове он переинициализировался при необходимости
+        self._user_cache.pop(updated_account.id, None)
+
+        return updated_account.access_token or access_token
+
+    async def _request_access_token(self, account: AvitoAccount) -> tuple[str, datetime]:
         if not account.api_client_id or not account.api_client_secret:
             raise ValueError("Avito account credentials are not configured")
 
@@ -448,7 +459,7 @@ class AvitoService:
             "client_secret": account.api_client_secret,
         }
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.post("/token", data=data)
             response.raise_for_status()
             token_payload = response.json()
@@ -460,24 +471,14 @@ class AvitoService:
         expires_in = token_payload.get("expires_in")
         ttl = int(expires_in) if expires_in is not None else 3600
         expires_at = datetime.utcnow() + timedelta(seconds=ttl)
-
-        updated_account = await repo.update(
-            account,
-            access_token=access_token,
-            token_expires_at=expires_at,
-        )
-
-        # Сбросим кеш user_id, чтобы в следующем вызове он переинициализировался при необходимости
-        self._user_cache.pop(updated_account.id, None)
-
-        return updated_account.access_token or access_token
+        return access_token, expires_at
 
     async def _get_account_user_id(self, account_id: int, access_token: str) -> str:
         cached = self._user_cache.get(account_id)
         if cached:
             return cached
 
-        async with httpx.AsyncClient(base_url=settings.avito_api_base, timeout=15.0) as client:
+        async with shared_client(base_url=settings.avito_api_base, timeout=15.0) as client:
             response = await client.get("/core/v1/accounts/self", headers=self._build_headers(access_token))
             response.raise_for_status()
             data = response.json()
@@ -496,3 +497,8 @@ class AvitoService:
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
         }
+
+
+@lru_cache(maxsize=1)
+def get_avito_service() -> AvitoService:
+    return AvitoService()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.bot import Bot
+from app.models.telegram_chat import TelegramChat
+from app.repositories.avito_repository import AvitoAccountRepository
+from app.repositories.bot_repository import BotRepository
+from app.repositories.dialog_repository import DialogRepository
+from app.services.telegram import TelegramService
+
+logger = logging.getLogger(__name__)
+
+
+class BotService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.bot_repo = BotRepository(session)
+        self.dialog_repo = DialogRepository(session)
+        self.avito_repo = AvitoAccountRepository(session)
+
+    async def delete_bot(self, bot: Bot) -> None:
+        await self.dialog_repo.delete_for_bot(bot.id)
+        await self.avito_repo.detach_bot(bot.id)
+        await self.session.execute(delete(TelegramChat).where(TelegramChat.bot_id == bot.id))
+        await self.bot_repo.delete(bot)
+
+    @staticmethod
+    async def drop_webhook(bot_id: int, token: str) -> None:
+        try:
+            await TelegramService(token).delete_webhook(drop_pending_updates=True)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to delete Telegram webhook for bot %s: %s", bot_id, exc)
@@ -16,17 +16,18 @@ from app.models.bot import Bot
 from app.models.dialog import Dialog
 from app.models.project import Project
 from app.models.enums import BotStatus, DialogSource, MessageDirection, MessageStatus
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, flush_or_commit
 from app.repositories.avito_repository import AvitoAccountRepository
 from app.repositories.bot_repository import BotRepository
 from app.repositories.dialog_repository import DialogRepository
 from app.repositories.message_repository import MessageRepository
 from app.repositories.client_repository import ClientRepository
 from app.repositories.project_repository import ProjectRepository
-from app.services.avito import AvitoService
+from app.services.avito import get_avito_service
 from app.services.telegram import TelegramService
 from app.services.queue import TaskQueue
 from app.services.personal_telegram_account import PersonalTelegramAccountService
+from app.utils.timezones import get_zone
 
 
 logger = logging.getLogger(__name__)
@@ -61,7 +62,7 @@ class DialogService:
         self.avito_repo = AvitoAccountRepository(session)
         self.client_repo = ClientRepository(session)
         self.project_repo = ProjectRepository(session)
-        self.avito_service = AvitoService()
+        self.avito_service = get_avito_service()
 
     async def _resolve_project_for_avito_account(self, account: Any, *, client_id: int) -> Project | None:
         project: Project | None = None
@@ -117,9 +118,7 @@ class DialogService:
         if dialog.project_id == project.id:
             return dialog
         dialog.project_id = project.id
-        dialog.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(dialog)
+        await flush_or_commit(self.session)
         return dialog
 
     async def _resolve_project_for_dialog(self, dialog: Dialog, *, bot: Bot | None = None) -> tuple[Dialog, Project | None]:
@@ -178,11 +177,10 @@ class DialogService:
             return {"ignored": True, "reason": "empty"}
 
         if source_message_id:
-            existing = await self.message_repo.get_by_source(
+            if await self.message_repo.exists_by_source(
                 direction=MessageDirection.avito.value,
                 source_message_id=source_message_id,
-            )
-            if existing:
+            ):
                 return {"ignored": True, "reason": "duplicate"}
 
         context = await self._ensure_dialog_context(
@@ -484,11 +482,10 @@ class DialogService:
         sender: Optional[str] = None,
         item_title: Optional[str] = None,
     ) -> Dict[str, Any]:
-        existing = await self.message_repo.get_by_source(
+        if await self.message_repo.exists_by_source(
             direction=MessageDirection.avito.value,
             source_message_id=source_key,
-        )
-        if existing:
+        ):
             return {"ignored": True, "reason": "duplicate"}
 
         avito_account = await self.avito_repo.get(avito_account_id)
@@ -613,7 +610,7 @@ class DialogService:
                     or result.get("forum_topic_id")
                     or result.get("topic", {}).get("message_thread_id")
                 )
-            dialog = await self.dialog_repo.create(
+            dialog, created_flag = await self.dialog_repo.get_or_create(
                 client_id=client_id,
                 project_id=project.id if project is not None else getattr(avito_account, "project_id", None),
                 bot_id=bot.id,
@@ -624,8 +621,7 @@ class DialogService:
                 telegram_topic_id=str(topic_id) if topic_id else None,
             )
             telegram_topic_id = dialog.telegram_topic_id
-            topic_created = bool(telegram_topic_id)
-            created_flag = True
+            topic_created = created_flag and bool(telegram_topic_id)
         elif bot.topic_mode and telegram_chat_id and not telegram_topic_id:
             base_title = resolved_item_title or sender or f"Диалог {avito_dialog_id}"
             topic_title = self._compose_topic_title(base_title, status="incoming")
@@ -671,7 +667,7 @@ class DialogService:
             )
             if header_sent:
                 dialog.topic_intro_sent = True
-                await self.session.commit()
+                await flush_or_commit(self.session)
                 dialog_topic_intro_sent = True
             else:
                 logger.warning(
@@ -1292,8 +1288,7 @@ class DialogService:
 
             if header_sent:
                 dialog.topic_intro_sent = True
-                await self.session.commit()
-                await self.session.refresh(dialog)
+                await flush_or_commit(self.session)
 
             try:
                 thread_id_int = int(telegram_topic_id)
@@ -1513,6 +1508,7 @@ class DialogService:
 
         dialog = await self.dialog_repo.touch(dialog)
 
+        await self.session.commit()
         await TaskQueue.enqueue(
             "avito.send_message",
             {
@@ -1552,10 +1548,10 @@ class DialogService:
     def _resolve_timezone(tz_name: str | None) -> ZoneInfo:
         if tz_name:
             try:
-                return ZoneInfo(tz_name)
+                return get_zone(tz_name)
             except ZoneInfoNotFoundError:
                 logger.warning("Unknown timezone %s, falling back to UTC", tz_name)
-        return ZoneInfo("UTC")
+        return get_zone("UTC")
 
     @staticmethod
     def _calculate_window_start(
@@ -1843,6 +1839,9 @@ class DialogService:
         enqueue_results: list[dict[str, Any]] = []
         status_should_update = False
 
+        if should_enqueue and dialog.source != DialogSource.telegram.value and (text or attachment_records):
+            await self.session.commit()
+
         if should_enqueue and text and dialog.source != DialogSource.telegram.value:
             await TaskQueue.enqueue(
                 "avito.send_message",
@@ -1983,6 +1982,7 @@ class DialogService:
             current=None,
         )
 
+        await self.session.commit()
         await TaskQueue.enqueue(
             "avito.send_message",
             {
@@ -5,7 +5,7 @@ import logging
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -46,15 +46,33 @@ class LoginSession:
     status: str = "pending"
     error: Optional[str] = None
     account_id: Optional[int] = None
+    account: Optional[PersonalTelegramAccount] = None
     task: Optional[asyncio.Task[Any]] = None
     cleanup_task: Optional[asyncio.Task[Any]] = None
     password_prompted_at: Optional[datetime] = None
 
 
+_LIST_CACHE_PREFIX = "tuberry:personal:accounts"
+_LIST_CACHE_TTL = 60
+
 _LOGIN_SESSIONS: Dict[str, LoginSession] = {}
 _LOGIN_LOCK = asyncio.Lock()
 
 
+def _list_cache_key(client_id: int, project_id: Optional[int], fingerprint: str) -> str:
+    return f"{_LIST_CACHE_PREFIX}:{client_id}:{'all' if project_id is None else project_id}:{fingerprint}"
+
+
+def _completed_account(session: LoginSession) -> Optional[PersonalTelegramAccount]:
+    return session.account if session.status == "completed" else None
+
+
+async def _stream_accounts(client_id: int, project_id: Optional[int]) -> AsyncIterator[PersonalTelegramAccount]:
+    async with SessionLocal() as db_session:
+        async for account in PersonalTelegramAccountRepository(db_session).iter_for_client(client_id, project_id):
+            yield account
+
+
 class PersonalTelegramAccountService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -71,8 +89,7 @@ class PersonalTelegramAccountService:
         api_id, api_hash = settings.get_personal_telegram_credentials()
         device_info = settings.get_personal_telegram_device_info()
 
-        project = await self.project_repo.get(project_id)
-        if project is None or project.client_id != client_id:
+        if not await self.project_repo.owns(project_id, client_id):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Проект не найден")
 
         login_id = uuid.uuid4().hex
@@ -119,7 +136,15 @@ class PersonalTelegramAccountService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Сессия не найдена или недоступна")
         return session
 
-    async def submit_password(self, *, login_id: str, client_id: int, password: str) -> LoginSession:
+    async def get_login_session_with_account(
+        self, *, login_id: str, client_id: int
+    ) -> tuple[LoginSession, Optional[PersonalTelegramAccount]]:
+        session = await self.get_login_session(login_id=login_id, client_id=client_id)
+        return session, _completed_account(session)
+
+    async def submit_password(
+        self, *, login_id: str, client_id: int, password: str
+    ) -> tuple[LoginSession, Optional[PersonalTelegramAccount]]:
         if not password.strip():
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пароль не может быть пустым")
         async with _LOGIN_LOCK:
@@ -134,7 +159,7 @@ class PersonalTelegramAccountService:
         except errors.PasswordHashInvalidError:
             session.status = "password_required"
             session.error = "Неверный пароль"
-            return session
+            return session, None
         except Exception as exc:  # noqa: BLE001
             logger.exception("Failed to complete login with password")
             session.status = "error"
@@ -148,7 +173,7 @@ class PersonalTelegramAccountService:
             pass
         if session.cleanup_task is None:
             session.cleanup_task = asyncio.create_task(self._schedule_cleanup(login_id))
-        return session
+        return session, _completed_account(session)
 
     async def _wait_for_login(self, session: LoginSession, qr_login: Any, timeout: int) -> None:
         try:
@@ -193,8 +218,7 @@ class PersonalTelegramAccountService:
             account_repo = PersonalTelegramAccountRepository(db_session)
             project_repo = ProjectRepository(db_session)
 
-            project = await project_repo.get(session.project_id)
-            if project is None or project.client_id != session.client_id:
+            if not await project_repo.owns(session.project_id, session.client_id):
                 session.status = "error"
                 session.error = "Проект недоступен"
                 return
@@ -222,6 +246,7 @@ class PersonalTelegramAccountService:
 
         session.status = "completed"
         session.account_id = account.id
+        session.account = account
         session.error = None
 
     async def _schedule_cleanup(self, login_id: str, delay: int = 300) -> None:
@@ -241,14 +266,41 @@ class PersonalTelegramAccountService:
     # ------------------------------------------------------------------ #
     # CRUD operations
     # ------------------------------------------------------------------ #
+    async def list_accounts_fingerprint(self, *, client_id: int, project_id: Optional[int] = None) -> str:
+        last_changed, count = await self.account_repo.fingerprint(client_id, project_id)
+        if project_id is not None and not count and not await self.project_repo.owns(project_id, client_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Проект не найден")
+        stamp = int(last_changed.timestamp() * 1_000_000) if last_changed else 0
+        return f'W/"{stamp}-{count}"'
+
+    async def get_cached_list(self, *, client_id: int, project_id: Optional[int], fingerprint: str) -> Optional[str]:
+        try:
+            return await TaskQueue.client().get(_list_cache_key(client_id, project_id, fingerprint))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to read cached account list: %s", exc)
+            return None
+
+    async def cache_list(self, *, client_id: int, project_id: Optional[int], fingerprint: str, payload: bytes) -> None:
+        try:
+            await TaskQueue.client().set(_list_cache_key(client_id, project_id, fingerprint), payload, ex=_LIST_CACHE_TTL)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to cache account list: %s", exc)
+
     async def list_accounts(self, *, client_id: int, project_id: Optional[int] = None) -> list[PersonalTelegramAccount]:
         if project_id is not None:
-            project = await self.project_repo.get(project_id)
-            if project is None or project.client_id != client_id:
+            accounts = await self.account_repo.list_for_project(project_id, client_id)
+            if not accounts and not await self.project_repo.owns(project_id, client_id):
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Проект не найден")
-            return await self.account_repo.list_for_project(project_id)
+            return accounts
         return await self.account_repo.list_for_client(client_id)
 
+    async def stream_accounts(
+        self, *, client_id: int, project_id: Optional[int] = None
+    ) -> AsyncIterator[PersonalTelegramAccount]:
+        if project_id is not None and not await self.project_repo.owns(project_id, client_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Проект не найден")
+        return _stream_accounts(client_id, project_id)
+
     async def get_account(self, *, account_id: int, client_id: int) -> PersonalTelegramAccount:
         account = await self.account_repo.get(account_id)
         if account is None or account.client_id != client_id:
@@ -258,7 +310,8 @@ class PersonalTelegramAccountService:
     async def update_account(
         self,
         *,
-        account: PersonalTelegramAccount,
+        account_id: int,
+        client_id: int,
         display_name: Optional[str] = None,
         accepts_private: Optional[bool] = None,
         accepts_groups: Optional[bool] = None,
@@ -274,20 +327,15 @@ class PersonalTelegramAccountService:
             updates["accepts_groups"] = bool(accepts_groups)
         if accepts_channels is not None:
             updates["accepts_channels"] = bool(accepts_channels)
-        if not updates:
-            return account
-        return await self.account_repo.update(account, **updates)
-
-    async def delete_account(self, *, account: PersonalTelegramAccount) -> None:
-        dialogs = await self.dialog_repo.list_for_personal_account(account.id)
-        now = datetime.utcnow()
-        for dialog in dialogs:
-            dialog.personal_account_id = None
-            dialog.external_display_name = dialog.external_display_name or account.display_name
-            dialog.updated_at = now
-        if dialogs:
-            await self.session.commit()
-        await self.account_repo.delete(account)
+        account = await self.account_repo.update_if_owned(account_id, client_id, **updates)
+        if account is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Аккаунт не найден")
+        return account
+
+    async def delete_account(self, *, account_id: int, client_id: int) -> None:
+        await self.dialog_repo.detach_personal_account(account_id, client_id)
+        if not await self.account_repo.delete_if_owned(account_id, client_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Аккаунт не найден")
 
     # ------------------------------------------------------------------ #
     # Messaging integration (implemented during later stages)
@@ -309,6 +357,7 @@ class PersonalTelegramAccountService:
             "text": text,
             "project_id": project_id,
         }
+        await self.session.commit()
         await TaskQueue.enqueue_personal("personal.send_message", payload)
         return {"queued": True}
 
@@ -345,7 +394,7 @@ class PersonalTelegramAccountService:
                 logger.exception("Failed to create topic for personal telegram dialog", account_id=account.id)
                 return {"ignored": True, "reason": "topic_creation_failed", "error": str(exc)}
 
-            dialog = await self.dialog_repo.create(
+            dialog, _ = await self.dialog_repo.get_or_create(
                 client_id=account.client_id,
                 project_id=project.id if project else None,
                 bot_id=bot.id,
@@ -1,8 +1,7 @@
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http import shared_client
 
 
 class TelegramService:
@@ -11,7 +10,7 @@ class TelegramService:
         self.base_url = f"{settings.telegram_api_base}/bot{token}"
 
     async def _post(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        async with httpx.AsyncClient(timeout=10) as client:
+        async with shared_client(timeout=10) as client:
             response = await client.post(f"{self.base_url}/{method}", json=payload)
             response.raise_for_status()
             data = response.json()
@@ -68,7 +67,7 @@ class TelegramService:
             form["message_thread_id"] = str(message_thread_id)
 
         files = {"photo": (filename or "photo.jpg", data, content_type or "application/octet-stream")}
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with shared_client(timeout=20) as client:
             response = await client.post(f"{self.base_url}/sendPhoto", data=form, files=files)
             response.raise_for_status()
             payload = response.json()
@@ -110,7 +109,7 @@ class TelegramService:
             form["duration"] = str(duration)
 
         files = {"voice": (filename or "voice.ogg", data, content_type or "application/octet-stream")}
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with shared_client(timeout=20) as client:
             response = await client.post(f"{self.base_url}/sendVoice", data=form, files=files)
             response.raise_for_status()
             payload = response.json()
@@ -147,7 +146,7 @@ class TelegramService:
             form["message_thread_id"] = str(message_thread_id)
 
         files = {"document": (filename or "file.bin", data, content_type or "application/octet-stream")}
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with shared_client(timeout=20) as client:
             response = await client.post(f"{self.base_url}/sendDocument", data=form, files=files)
             response.raise_for_status()
             payload = response.json()
@@ -156,7 +155,7 @@ class TelegramService:
         return payload["result"]
 
     async def download_file(self, file_id: str) -> tuple[bytes, str | None, str | None]:
-        async with httpx.AsyncClient(timeout=20) as client:
+        async with shared_client(timeout=20) as client:
             response = await client.get(f"{self.base_url}/getFile", params={"file_id": file_id})
             response.raise_for_status()
             payload = response.json()
@@ -169,7 +168,7 @@ class TelegramService:
             raise ValueError("file_path is missing in getFile response")
 
         download_url = f"{settings.telegram_api_base}/file/bot{self.token}/{file_path}"
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with shared_client(timeout=30) as client:
             file_response = await client.get(download_url)
             file_response.raise_for_status()
             content = file_response.content
@@ -253,7 +252,7 @@ class TelegramService:
             payload["offset"] = offset
         if limit is not None:
             payload["limit"] = limit
-        async with httpx.AsyncClient(timeout=10) as client:
+        async with shared_client(timeout=10) as client:
             response = await client.get(f"{self.base_url}/getForumTopicList", params=payload)
             response.raise_for_status()
             data = response.json()
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
 from html import escape
 from typing import Any, Awaitable, Callable, Dict, Optional
 
 import httpx
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.session import flush_or_commit
 from app.core.config import settings
 from app.models.bot import Bot
 from app.models.dialog import Dialog
@@ -84,7 +85,10 @@ class TelegramSourceService:
         if sender.get("is_bot"):
             return {"status": "ignored", "reason": "bot_event"}
 
-        controller_bot = await self.bot_repo.get(source.bot_id)
+        if "bot" in inspect(source).unloaded:
+            controller_bot = await self.bot_repo.get(source.bot_id)
+        else:
+            controller_bot = source.bot
         if controller_bot is None:
             raise ValueError("Управляющий бот для Telegram источника не найден")
         if not controller_bot.group_chat_id:
@@ -146,9 +150,7 @@ class TelegramSourceService:
 
         if dialog is not None and project is not None and dialog.project_id != project.id:
             dialog.project_id = project.id
-            dialog.updated_at = datetime.utcnow()
-            await self.session.commit()
-            await self.session.refresh(dialog)
+            await flush_or_commit(self.session)
 
         topic_id: Optional[str] = dialog.telegram_topic_id if dialog else None
         created_dialog = False
@@ -160,7 +162,7 @@ class TelegramSourceService:
                 target_chat_id=target_chat_id,
                 client_label=display_name or username or external_reference,
             )
-            dialog = await self.dialog_repo.create(
+            dialog, created_dialog = await self.dialog_repo.get_or_create(
                 client_id=source.client_id,
                 project_id=project.id if project is not None else getattr(source, "project_id", None),
                 bot_id=controller_bot.id,
@@ -174,16 +176,16 @@ class TelegramSourceService:
                 external_display_name=display_name,
                 external_username=username,
             )
-            created_dialog = True
-            await self._send_intro_message(
-                manager_service=manager_service,
-                dialog=dialog,
-                bot=controller_bot,
-                source=source,
-                display_name=display_name,
-                username=username,
-                external_reference=external_reference,
-            )
+            if created_dialog:
+                await self._send_intro_message(
+                    manager_service=manager_service,
+                    dialog=dialog,
+                    bot=controller_bot,
+                    source=source,
+                    display_name=display_name,
+                    username=username,
+                    external_reference=external_reference,
+                )
 
         updates_performed = False
         if display_name and display_name != dialog.external_display_name:
@@ -196,8 +198,7 @@ class TelegramSourceService:
             dialog.telegram_chat_id = target_chat_id
             updates_performed = True
         if updates_performed:
-            await self.session.commit()
-            await self.session.refresh(dialog)
+            await flush_or_commit(self.session)
 
         text_value = message.get("text")
         caption_value = message.get("caption")
@@ -454,8 +455,7 @@ class TelegramSourceService:
             external_reference=external_reference,
         )
         dialog.topic_intro_sent = True
-        await self.session.commit()
-        await self.session.refresh(dialog)
+        await flush_or_commit(self.session)
 
         thread_id = self._normalize_topic_id(dialog.telegram_topic_id)
         result = await send_callable(thread_id)
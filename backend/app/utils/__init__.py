@@ -0,0 +1,4 @@
+from app.utils.timezones import get_zone
+from app.utils.tokens import fresh_token
+
+__all__ = ["fresh_token", "get_zone"]
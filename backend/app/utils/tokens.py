@@ -0,0 +1,31 @@
+import base64
+import os
+import threading
+
+_TOKEN_BYTES = 16
+_BATCH = 256
+
+_lock = threading.Lock()
+_buffer = b""
+_offset = 0
+
+
+def fresh_token() -> str:
+    global _buffer, _offset
+    with _lock:
+        if _offset >= len(_buffer):
+            _buffer = os.urandom(_TOKEN_BYTES * _BATCH)
+            _offset = 0
+        chunk = _buffer[_offset:_offset + _TOKEN_BYTES]
+        _offset += _TOKEN_BYTES
+    return base64.urlsafe_b64encode(chunk).rstrip(b"=").decode("ascii")
+
+
+def _reset_after_fork() -> None:
+    global _buffer, _offset
+    _buffer = b""
+    _offset = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -428,7 +428,7 @@ async def poll_once(mark_read: bool) -> None:
                 AvitoAccount.monitoring_enabled.is_(True),
             )
         )
-        accounts = list(result.scalars().all())
+        accounts = result.scalars().all()
 
     if not accounts:
         LOGGER.debug("no linked Avito accounts to poll")
@@ -64,28 +64,26 @@ class PersonalTelegramWorker:
     async def _sync_accounts_once(self) -> None:
         async with SessionLocal() as session:
             repo = PersonalTelegramAccountRepository(session)
-            active_accounts = await repo.list_active()
-
-        active_ids = {account.id for account in active_accounts}
+            active_accounts = {account.id: account.session_payload async for account in repo.iter_active()}
 
         # stop clients that are no longer active
         for account_id in list(self._clients.keys()):
-            if account_id not in active_ids:
+            if account_id not in active_accounts:
                 await self._stop_client(account_id)
 
         # start new clients
-        for account in active_accounts:
-            if account.session_payload is None:
-                await self._mark_account_error(account.id, "Отсутствует сохранённая сессия")
+        for account_id, session_payload in active_accounts.items():
+            if session_payload is None:
+                await self._mark_account_error(account_id, "Отсутствует сохранённая сессия")
                 continue
-            if account.id in self._clients:
+            if account_id in self._clients:
                 continue
             try:
-                await self._start_client(account.id, account.session_payload)
-                logger.info("Personal Telegram client started", account_id=account.id)
+                await self._start_client(account_id, session_payload)
+                logger.info("Personal Telegram client started", account_id=account_id)
             except Exception as exc:  # noqa: BLE001
-                logger.exception("Failed to start personal telegram client", account_id=account.id, error=str(exc))
-                await self._mark_account_error(account.id, f"Не удалось запустить сессию: {exc}")
+                logger.exception("Failed to start personal telegram client", account_id=account_id, error=str(exc))
+                await self._mark_account_error(account_id, f"Не удалось запустить сессию: {exc}")
 
     async def _start_client(self, account_id: int, session_payload: str) -> None:
         session_string = decrypt_payload(session_payload)
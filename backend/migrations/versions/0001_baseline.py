@@ -0,0 +1,22 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2024-06-01 00:00:00
+"""
+from alembic import op
+
+from app.db.session import sync_schema
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    sync_schema(op.get_bind())
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,42 @@
+"""server-side default for created_at
+
+Revision ID: 0002_created_at_server_default
+Revises: 0001_baseline
+Create Date: 2024-06-02 00:00:00
+"""
+from alembic import op
+
+revision = "0002_created_at_server_default"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+TABLES = (
+    "audit_logs",
+    "avito_accounts",
+    "bots",
+    "clients",
+    "dialogs",
+    "messages",
+    "personal_telegram_accounts",
+    "project_settings",
+    "projects",
+    "telegram_chats",
+    "telegram_sources",
+    "users",
+    "webhook_events",
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at SET DEFAULT now()")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN created_at DROP DEFAULT")
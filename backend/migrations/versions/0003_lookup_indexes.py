@@ -0,0 +1,61 @@
+"""composite indexes for repository lookups
+
+Revision ID: 0003_lookup_indexes
+Revises: 0002_created_at_server_default
+Create Date: 2024-06-03 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_lookup_indexes"
+down_revision = "0002_created_at_server_default"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_dialogs_client_avito", "dialogs", ["client_id", "avito_dialog_id"], if_not_exists=True)
+    op.create_index(
+        "ix_dialogs_account_avito",
+        "dialogs",
+        ["avito_account_id", "avito_dialog_id"],
+        postgresql_where=sa.text("source = 'avito'"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_dialogs_bot_topic", "dialogs", ["bot_id", "telegram_topic_id"], if_not_exists=True)
+    op.create_index(
+        "ix_dialogs_bot_chat_last",
+        "dialogs",
+        ["bot_id", "telegram_chat_id", "last_message_at"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_dialogs_tgsrc_ref",
+        "dialogs",
+        ["telegram_source_id", "external_reference"],
+        postgresql_where=sa.text("source = 'telegram'"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_messages_dir_src", "messages", ["direction", "source_message_id", "id"], if_not_exists=True)
+    op.create_index("ix_messages_tgmid", "messages", ["telegram_message_id", "id"], if_not_exists=True)
+    op.create_index(
+        "ix_messages_outgoing",
+        "messages",
+        ["dialog_id", "created_at"],
+        postgresql_where=sa.text("direction = 'telegram' AND is_auto_reply = false"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    for name, table in (
+        ("ix_messages_outgoing", "messages"),
+        ("ix_messages_tgmid", "messages"),
+        ("ix_messages_dir_src", "messages"),
+        ("ix_dialogs_tgsrc_ref", "dialogs"),
+        ("ix_dialogs_bot_chat_last", "dialogs"),
+        ("ix_dialogs_bot_topic", "dialogs"),
+        ("ix_dialogs_account_avito", "dialogs"),
+        ("ix_dialogs_client_avito", "dialogs"),
+    ):
+        op.drop_index(name, table_name=table, if_exists=True)
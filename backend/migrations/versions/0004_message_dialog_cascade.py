@@ -0,0 +1,34 @@
+"""cascade message rows when their dialog is deleted
+
+Revision ID: 0004_message_dialog_cascade
+Revises: 0003_lookup_indexes
+Create Date: 2024-06-04 00:00:00
+"""
+from alembic import op
+
+revision = "0004_message_dialog_cascade"
+down_revision = "0003_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+CONSTRAINT = "messages_dialog_id_fkey"
+
+
+def _recreate(ondelete: str) -> None:
+    op.execute(f"ALTER TABLE messages DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+    op.execute(
+        f"ALTER TABLE messages ADD CONSTRAINT {CONSTRAINT} "
+        f"FOREIGN KEY (dialog_id) REFERENCES dialogs (id){ondelete}"
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _recreate(" ON DELETE CASCADE")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _recreate("")
@@ -0,0 +1,28 @@
+"""unique natural key for dialogs
+
+Revision ID: 0005_dialog_natural_key
+Revises: 0004_message_dialog_cascade
+Create Date: 2024-06-05 00:00:00
+"""
+from alembic import op
+
+revision = "0005_dialog_natural_key"
+down_revision = "0004_message_dialog_cascade"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ux_dialogs_client_avito_source",
+        "dialogs",
+        ["client_id", "avito_dialog_id", "source"],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.drop_index("ix_dialogs_client_avito", table_name="dialogs", if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index("ix_dialogs_client_avito", "dialogs", ["client_id", "avito_dialog_id"], if_not_exists=True)
+    op.drop_index("ux_dialogs_client_avito_source", table_name="dialogs", if_exists=True)
@@ -0,0 +1,35 @@
+"""partial index for active telegram chats per bot
+
+Revision ID: 0006_telegram_chat_active_index
+Revises: 0005_dialog_natural_key
+Create Date: 2024-06-06 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_telegram_chat_active_index"
+down_revision = "0005_dialog_natural_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tgchat_active_list",
+            "telegram_chats",
+            ["bot_id", "title", "chat_id"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tgchat_active_list",
+            table_name="telegram_chats",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
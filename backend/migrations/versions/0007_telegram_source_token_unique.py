@@ -0,0 +1,20 @@
+"""unique index on telegram source tokens
+
+Revision ID: 0007_telegram_source_token_unique
+Revises: 0006_telegram_chat_active_index
+Create Date: 2024-06-07 00:00:00
+"""
+from alembic import op
+
+revision = "0007_telegram_source_token_unique"
+down_revision = "0006_telegram_chat_active_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ux_tgsrc_token", "telegram_sources", ["token"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_tgsrc_token", table_name="telegram_sources", if_exists=True)
@@ -0,0 +1,32 @@
+"""backfill and require telegram source webhook secrets
+
+Revision ID: 0008_telegram_source_secret_not_null
+Revises: 0007_telegram_source_token_unique
+Create Date: 2024-06-08 00:00:00
+"""
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_telegram_source_secret_not_null"
+down_revision = "0007_telegram_source_token_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    missing = bind.execute(sa.text("SELECT id FROM telegram_sources WHERE webhook_secret IS NULL")).scalars().all()
+    for source_id in missing:
+        bind.execute(
+            sa.text("UPDATE telegram_sources SET webhook_secret = :secret WHERE id = :id"),
+            {"secret": secrets.token_urlsafe(16), "id": source_id},
+        )
+    if bind.dialect.name == "postgresql":
+        op.alter_column("telegram_sources", "webhook_secret", existing_type=sa.String(), nullable=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column("telegram_sources", "webhook_secret", existing_type=sa.String(), nullable=True)
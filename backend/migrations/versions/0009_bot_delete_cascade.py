@@ -0,0 +1,40 @@
+"""cascade bot deletion to dialogs, chats and avito accounts
+
+Revision ID: 0009_bot_delete_cascade
+Revises: 0008_telegram_source_secret_not_null
+Create Date: 2024-06-09 00:00:00
+"""
+from alembic import op
+
+revision = "0009_bot_delete_cascade"
+down_revision = "0008_telegram_source_secret_not_null"
+branch_labels = None
+depends_on = None
+
+FOREIGN_KEYS = (
+    ("dialogs", "dialogs_bot_id_fkey", " ON DELETE CASCADE"),
+    ("telegram_chats", "telegram_chats_bot_id_fkey", " ON DELETE CASCADE"),
+    ("avito_accounts", "avito_accounts_bot_id_fkey", " ON DELETE SET NULL"),
+)
+
+
+def _recreate(table: str, constraint: str, ondelete: str) -> None:
+    op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+        f"FOREIGN KEY (bot_id) REFERENCES bots (id){ondelete}"
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, constraint, ondelete in FOREIGN_KEYS:
+        _recreate(table, constraint, ondelete)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, constraint, _ in FOREIGN_KEYS:
+        _recreate(table, constraint, "")
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401
+
+
+async def _run_in_session(func):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            return await func(session)
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+def run_db():
+    return lambda func: asyncio.run(_run_in_session(func))
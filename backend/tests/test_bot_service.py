@@ -0,0 +1,36 @@
+from sqlalchemy import func, select
+
+from app.models import AvitoAccount, Bot, Client, Dialog, TelegramChat
+from app.services.bot import BotService
+
+
+def test_delete_bot_removes_dependent_rows(run_db):
+    async def scenario(session):
+        client = Client(name="test")
+        session.add(client)
+        await session.flush()
+        bot = Bot(client_id=client.id, token="test-token")
+        session.add(bot)
+        await session.flush()
+        account = AvitoAccount(client_id=client.id, bot_id=bot.id)
+        session.add_all(
+            [
+                account,
+                Dialog(client_id=client.id, bot_id=bot.id, avito_dialog_id="u2i-1"),
+                TelegramChat(bot_id=bot.id, chat_id="-100"),
+            ]
+        )
+        await session.commit()
+
+        await BotService(session).delete_bot(bot)
+        await session.commit()
+
+        counts = []
+        for model in (Bot, Dialog, TelegramChat):
+            counts.append(await session.scalar(select(func.count()).select_from(model)))
+        await session.refresh(account)
+        return counts, account.bot_id
+
+    counts, account_bot_id = run_db(scenario)
+    assert counts == [0, 0, 0]
+    assert account_bot_id is None
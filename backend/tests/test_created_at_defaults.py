@@ -0,0 +1,72 @@
+from app.models import Bot, Client, Dialog
+from app.models.enums import MessageDirection
+from app.repositories.message_repository import MessageRepository
+from app.repositories.project_settings_repository import ProjectSettingsRepository
+from app.repositories.telegram_chat_repository import TelegramChatRepository
+
+
+async def _seed(session):
+    client = Client(name="test")
+    session.add(client)
+    await session.flush()
+    bot = Bot(client_id=client.id, token="test-token")
+    session.add(bot)
+    await session.flush()
+    dialog = Dialog(client_id=client.id, bot_id=bot.id, avito_dialog_id="u2i-1")
+    session.add(dialog)
+    await session.commit()
+    return client, bot, dialog
+
+
+def test_orm_inserts_fill_created_at(run_db):
+    async def scenario(session):
+        return await _seed(session)
+
+    for row in run_db(scenario):
+        assert row.created_at is not None
+
+
+def test_message_inserts_fill_created_at(run_db):
+    async def scenario(session):
+        _, _, dialog = await _seed(session)
+        repo = MessageRepository(session)
+        message = await repo.create(
+            dialog_id=dialog.id,
+            direction=MessageDirection.avito.value,
+            source_message_id="m-1",
+            body="hello",
+        )
+        await repo.bulk_insert([{"dialog_id": dialog.id, "direction": message.direction, "body": "again"}])
+        return await repo.list_for_dialog(dialog.id)
+
+    messages = run_db(scenario)
+    assert len(messages) == 2
+    assert all(message.created_at is not None for message in messages)
+
+
+def test_project_settings_insert_fills_created_at(run_db):
+    async def scenario(session):
+        return await ProjectSettingsRepository(session).get()
+
+    assert run_db(scenario).created_at is not None
+
+
+def test_upsert_membership_fills_created_at(run_db):
+    async def scenario(session):
+        _, bot, _ = await _seed(session)
+        repo = TelegramChatRepository(session)
+        kwargs = {
+            "bot_id": bot.id,
+            "chat_id": "-100",
+            "title": "chat",
+            "chat_type": "supergroup",
+            "username": None,
+            "is_forum": True,
+            "status": "member",
+        }
+        await repo.upsert_membership(is_member=True, **kwargs)
+        return await repo.upsert_membership(is_member=False, **kwargs)
+
+    chat = run_db(scenario)
+    assert chat.created_at is not None
+    assert chat.is_active is False
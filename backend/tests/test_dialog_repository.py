@@ -0,0 +1,28 @@
+from app.models import Bot, Client, Dialog
+from app.models.enums import DialogSource
+from app.repositories.dialog_repository import DialogRepository
+
+
+async def _get_or_create_twice(session):
+    client = Client(name="test")
+    session.add(client)
+    await session.flush()
+    bot = Bot(client_id=client.id, token="test-token")
+    session.add(bot)
+    await session.commit()
+
+    repo = DialogRepository(session)
+    fields = {"client_id": client.id, "bot_id": bot.id, "avito_dialog_id": "u2i-1", "source": DialogSource.avito}
+    first = await repo.get_or_create(**fields)
+    second = await repo.get_or_create(**fields)
+    return first, second
+
+
+def test_get_or_create_returns_existing_dialog(run_db):
+    (created, created_flag), (existing, existing_flag) = run_db(_get_or_create_twice)
+
+    assert isinstance(created, Dialog)
+    assert created_flag is True
+    assert created.created_at is not None
+    assert existing.id == created.id
+    assert existing_flag is False
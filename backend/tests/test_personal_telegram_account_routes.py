@@ -0,0 +1,30 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.user_cache import CachedUser
+from app.models.enums import UserRole
+from app.routes.personal_telegram_accounts import get_client_user
+
+
+def _user(client_id):
+    return CachedUser(
+        id=1,
+        client_id=client_id,
+        telegram_user_id=None,
+        email="user@example.com",
+        full_name=None,
+        role=UserRole.owner,
+        is_active=True,
+        is_privileged=True,
+    )
+
+
+def test_get_client_user_rejects_user_without_client():
+    with pytest.raises(HTTPException) as exc_info:
+        get_client_user(_user(None))
+    assert exc_info.value.status_code == 400
+
+
+def test_get_client_user_returns_attached_user():
+    user = _user(7)
+    assert get_client_user(user) is user
@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models import Client, Project
+from app.services.personal_telegram_account import PersonalTelegramAccountService
+
+
+async def _seed(session):
+    owner = Client(name="owner")
+    other = Client(name="other")
+    session.add_all([owner, other])
+    await session.flush()
+    project = Project(client_id=other.id, name="foreign")
+    session.add(project)
+    await session.commit()
+    return owner, project
+
+
+def test_fingerprint_rejects_foreign_and_missing_projects(run_db):
+    async def scenario(session):
+        owner, foreign_project = await _seed(session)
+        service = PersonalTelegramAccountService(session)
+        statuses = []
+        for project_id in (foreign_project.id, 9999):
+            with pytest.raises(HTTPException) as exc_info:
+                await service.list_accounts_fingerprint(client_id=owner.id, project_id=project_id)
+            statuses.append(exc_info.value.status_code)
+        return statuses, await service.list_accounts_fingerprint(client_id=owner.id)
+
+    statuses, fingerprint = run_db(scenario)
+    assert statuses == [404, 404]
+    assert fingerprint == 'W/"0-0"'